@@ -1,46 +1,367 @@
 import os
+import time
+import shutil
+import asyncio
+import threading
 import requests
 import json
-from datetime import datetime, timedelta
-from urllib.parse import urlparse, urlencode, quote, quote
-from config import (
-    RZN1_BASE_URL, RZN1_ENDPOINTS, RZN1_GET_REPORTS_ENDPOINT, RZN1_WAREHOUSE,
-    TEMP_DOWNLOAD_DIR, get_date_prefix
-)
+import logging
+import orjson
+import functools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, date
+from urllib.parse import urlparse
+from config import cfg, TEMP_DOWNLOAD_DIR, ensure_temp_dir
+from auth import get_auth_token, invalidate_token
 from logger_config import setup_logger, get_default_log_file
 
 # Setup logger
 logger = setup_logger('api_client', get_default_log_file('api_client'))
 RZN1_WAREHOUSE = "up090_lko_mat"
+
+# Connection pool sizing for the RZN1 session (keep-alive connections per host)
+POOL_CONNECTIONS = 8
+POOL_MAXSIZE = 32
+# Concurrent downloads must not exceed the pool size or connections get discarded
+DOWNLOAD_WORKERS = 8
+# Report types are generated concurrently over the same keep-alive pool
+GENERATE_WORKERS = 5
+# Seconds a fetched reports list is reused before the endpoint is queried again
+REPORTS_CACHE_TTL = cfg.RZN1_REPORTS_CACHE_TTL
+# Polling schedule while waiting for generated reports (seconds)
+POLL_INITIAL_DELAY = 2
+POLL_MAX_DELAY = 30
+POLL_MAX_WAIT = 600
+# Download streaming sizes (bytes)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+
+# Warehouse list from the curl command
+_WAREHOUSE_LIST = (
+    "hr009_pla_ls1", "up096_bab_ls1", "up097_ali_ls1", "up098_sag_ls1", 
+    "up099_ban_ls1", "up100_aso_ls1", "up101_ach_ls1", "up102_man_ls1", 
+    "up103_shi_ls1", "up104_der_ls1", "up105_dos_ls1", "up106_miy_ls1", 
+    "up107_jac_ls1", "up108_kum_ls1", "up109_rac_ls1", "up110_lal_hm1", 
+    "up111_bel_hm1", "up112_gos_hm1", "hr007_rjv_ls1", "up061_kur_ls1", 
+    "up083_fat_ls1", "up081_hat_ls1", "up070_tik_ls1", "up064_bha_ls1", 
+    "up054_kur_ls1", "up087_maw_ls1", "up077_bik_ls1", "up076_hai_ls1", 
+    "up073_gbx_ls1", "up069_mah_ls1", "up044_jas_ls1", "up051_has_ls1", 
+    "up067_jag_ls1", "up057_lam_ls1", "up079_bhi_ls1", "up080_tar_ls1", 
+    "up082_mus_ls1", "up090_lko_mat", "up075_ran_ls1", "up043_gau_ls1"
+)
+
+_ORDER_SUMMARY_COLUMNS = (
+    "Cancelled Order Qty", "OrderStatus", "DispatchType", "WAC", "Created By", 
+    "Order Reference", "Order Date", "Cancelled By", "Cancelled By User", 
+    "Customer Name", "Customer GST", "Customer Phone Number", "Order Type", 
+    "Slot From", "Slot To", "SKU Desc", "SKU Code", "SKU Category", 
+    "SKU Sub Category", "SKU Weight", "SKU Brand", "Order Qty", "Mrp", 
+    "Unit Price", "Discount", "Customer Po Number", "OrderAmount(w/o-Tax)", 
+    "CGST", "IGST", "SGST", "CESS", "OrderTaxAmount", "TotalOrderAmount", 
+    "Shipping Taxable Amt", "ShippingTaxAmount", "Price", 
+    "Drop Ship PO Reference", "Currency", "Payment Mode", "Invoice Number", 
+    "Challan number", "UnfulfilledQuantity", "InvoiceAmount", 
+    "InvoiceAmount(w/o-tax)", "InvoiceTaxAmount", "InvoiceCGSTAmount", 
+    "InvoiceSGSTAmount", "InvoiceIGSTAmount", "InvoiceCESSAmount", 
+    "InvoiceDate", "PicklistConfirmationDate", "Margin Amt", 
+    "Invoice_quantity", "TotalProcurementPrice", "ProcurementPrice", 
+    "Picklist Details", "Order Fields", "ShippingAmount", "Order_Hold_Status"
+)
+
+_SALES_RETURN_COLUMNS = (
+    "Order Reference", "Order Date", "Customer Id", "Customer Name", 
+    "Customer Pincode", "Customer Country", "Invoice / Challan Number", 
+    "Invoice Date", "Return Id", "Reference Type", "Return Type", 
+    "Return Date", "Credit Note Date", "Credit Note Number", "Sku Code", 
+    "Sku Reference", "Sku Description", "Sku Category", "Sku Sub Category", 
+    "Sku Brand", "Weight", "Unit Price", "HSN Code", "Quantity", 
+    "CreditNoteAmount(w/o-tax)", "CGST", "SGST", "IGST", "CESS", 
+    "SGSTAmount", "IGSTAmount", "CESSAmount", "TaxPercentage", 
+    "CreditNoteTaxAmount", "TotalCreditNoteAmount", "Accepted User", 
+    "Customer State", "Customer GST Number", "GST Number", "Reason", 
+    "ExtraFields", "CGSTAmount"
+)
+
+# Batch level inventory and closing stock share report 13 and its columns
+_STOCK_COLUMNS = (
+    "SKU Code", "SKU Reference", "SKU Category", "SKU Sub Category", 
+    "SKU Brand", "Product Description", "SKU Class", "Status", 
+    "Batch No", "Manufactured Date", "Expiry Date", "MRP", "Price", 
+    "Vendor Batch No", "Restest Date", "Re-evaluation Date", 
+    "Best Before Date", "Inspection Lot Number", "Weight", 
+    "Batch Reference", "Zone", "Location", "Total Quantity", 
+    "Reserved_Quantity", "Available Quantity"
+)
+
+_OPEN_ORDER_SUMMARY_COLUMNS = (
+    "Cancelled Order Qty", "OrderStatus", "Created By", "Order Reference", 
+    "Order Date", "Cancelled By", "Cancelled By User", "Customer Name", 
+    "Customer GST", "Customer Phone Number", "Order Type", "Slot From", 
+    "Slot To", "SKU Desc", "SKU Code", "SKU Category", "SKU Sub Category", 
+    "SKU Weight", "SKU Brand", "Order Qty", "Mrp", "Unit Price", 
+    "Customer Po Number", "Customer Reference", "Open Order quantity", 
+    "Allocation Details"
+)
+
+def _compact_json(values):
+    """Serialise a list without spaces to match the curl format"""
+    return json.dumps(list(values), separators=(',', ':'))
+
+# Pre-serialised JSON for the static arrays, computed once at import
+_WAREHOUSE_JSON = _compact_json(_WAREHOUSE_LIST)
+_SINGLE_WAREHOUSE_JSON = _compact_json((RZN1_WAREHOUSE,))
+_COLUMNS_JSON_ORDER_SUMMARY = _compact_json(_ORDER_SUMMARY_COLUMNS)
+_COLUMNS_JSON_SALES_RETURN = _compact_json(_SALES_RETURN_COLUMNS)
+_COLUMNS_JSON_STOCK = _compact_json(_STOCK_COLUMNS)
+_COLUMNS_JSON_OPEN_ORDER_SUMMARY = _compact_json(_OPEN_ORDER_SUMMARY_COLUMNS)
+
+_STOCK_FILTER_FIELDS = ('SKU Code', 'SKU Category', 'Zone', 'Location')
+
+def _make_stock_params(warehouses, warehouse_json):
+    """Build the report 13 (batch level inventory) parameters for the given warehouses"""
+    params = {
+        'id': '13',
+        'columns': _STOCK_COLUMNS,
+        'Warehouse': warehouses,
+        '_columns_json': _COLUMNS_JSON_STOCK,
+        '_warehouse_json': warehouse_json
+    }
+    params.update(dict.fromkeys(_STOCK_FILTER_FIELDS, ''))
+    return params
+
+# Static report parameters matching the exact curl commands; 'From Date' is
+# filled in per call for the report types listed in _YESTERDAY_REPORTS
+_REPORT_PARAMS = {
+    'order_summary': {
+        'id': '100',
+        'columns': _ORDER_SUMMARY_COLUMNS,
+        'Warehouse': _WAREHOUSE_LIST,
+        'To Date': '',
+        'Order Reference': '',
+        'Customer Name': '',
+        'Order Type': '',
+        'SKU Code': '',
+        '_columns_json': _COLUMNS_JSON_ORDER_SUMMARY,
+        '_warehouse_json': _WAREHOUSE_JSON
+    },
+    'sales_return': {
+        'id': '95',
+        'columns': _SALES_RETURN_COLUMNS,
+        'Warehouse': _WAREHOUSE_LIST,
+        'Order Reference': '',
+        'Customer Id': '',
+        'Invoice / Challan Number': '',
+        'Return Id': '',
+        'Reference Type': '',
+        'Credit Note Number': '',
+        'Sku Code': '',
+        'To Date': '',
+        '_columns_json': _COLUMNS_JSON_SALES_RETURN,
+        '_warehouse_json': _WAREHOUSE_JSON
+    },
+    'batch_level_inventory': _make_stock_params((RZN1_WAREHOUSE,), _SINGLE_WAREHOUSE_JSON),  # Single warehouse
+    'open_order_summary': {
+        'id': '145',
+        'columns': _OPEN_ORDER_SUMMARY_COLUMNS,
+        'Warehouse': (RZN1_WAREHOUSE,),  # Single warehouse for open orders
+        'From Date': "2025-09-01",  # Use specific date like in curl
+        'To Date': '',
+        'Order Reference': '',
+        'Customer Name': '',
+        'Order Type': '',
+        'SKU Code': '',
+        '_columns_json': _COLUMNS_JSON_OPEN_ORDER_SUMMARY,
+        '_warehouse_json': _SINGLE_WAREHOUSE_JSON
+    },
+    # Same as batch level inventory but for all warehouses
+    'closing_stock': _make_stock_params(_WAREHOUSE_LIST, _WAREHOUSE_JSON)
+}
+
+_YESTERDAY_REPORTS = frozenset({'order_summary', 'sales_return'})
+
+# Query-string layout per GET report type: whether the date range is sent and
+# which filter fields follow it, in curl order
+_REPORT_SPECS = {
+    'order_summary': {
+        'use_date': True,
+        'extra_fields': ('Order Reference', 'Customer Name', 'Order Type', 'SKU Code')
+    },
+    'sales_return': {
+        'use_date': True,
+        'extra_fields': ('Order Reference', 'Customer Id', 'Invoice / Challan Number',
+                         'Return Id', 'Reference Type', 'Credit Note Number', 'Sku Code')
+    },
+    'closing_stock': {
+        'use_date': False,
+        'extra_fields': _STOCK_FILTER_FIELDS
+    },
+    'batch_level_inventory': {
+        'use_date': False,
+        'extra_fields': _STOCK_FILTER_FIELDS
+    },
+    'open_order_summary': {
+        'use_date': True,
+        'extra_fields': ('Order Reference', 'Customer Name', 'Order Type', 'SKU Code')
+    }
+}
+
+# Name matchers for report patterns that need more than a substring test,
+# applied to report names lowercased with underscores replaced by spaces
+_PATTERN_MATCHERS = {
+    # Exclude "Open" reports
+    'sales return': lambda name: 'sales return' in name and 'open' not in name,
+    # Exact match for ORDER SUMMARY to avoid confusion with Open Order Summary
+    'order summary': lambda name: (name == 'order summary' or
+                                   'order summary' in name and 'open' not in name),
+    # Closing stock generates "Batch Level Inventory Report"
+    'closing stock': lambda name: 'batch level inventory' in name,
+    'batch level inventory': lambda name: 'batch level inventory' in name,
+    'open order summary': lambda name: 'open order summary' in name,
+}
+
+def _pattern_matcher(report_name_pattern):
+    """
+    Return a predicate over normalised report names for the given pattern
+    Normalising handles "order summary" vs "order_summary" and "sales return" vs "sales_return"
+    """
+    pattern_normalized = report_name_pattern.lower().replace('_', ' ')
+    matcher = _PATTERN_MATCHERS.get(pattern_normalized)
+    if matcher is None:
+        matcher = lambda name: pattern_normalized in name
+    return matcher
+
+@functools.lru_cache(maxsize=1)
+def _yesterday(today_ordinal):
+    """Format the day before the given proleptic ordinal as YYYY-MM-DD"""
+    return date.fromordinal(today_ordinal - 1).strftime("%Y-%m-%d")
+
 class DualServiceAPIClient:
-    def __init__(self, tokens):
+    def __init__(self, tokens, reports_cache_ttl=REPORTS_CACHE_TTL):
         """
         Initialize API client for RZN1 service
         Args:
             tokens (dict): Dictionary with 'rzn1' token
+            reports_cache_ttl (float): Seconds to reuse a fetched reports list
         """
         self.tokens = tokens
         self.sessions = {}
         self.warehouse = RZN1_WAREHOUSE  # Set warehouse attribute
         
+        # In-process cache of reports lists: service -> (fetched_at, reports)
+        self._reports_cache = {}
+        self._reports_cache_ttl = reports_cache_ttl
+        self._reports_cache_lock = threading.Lock()
+        
+        # Last ETag and parsed listing per service for conditional GETs
+        self._etags = {}
+        self._last_lists = {}
+        
+        # Prepared reports-list requests per service, reused on every poll
+        self._reports_prep = {}
+        
+        # Unauthenticated session for pre-signed S3 downloads
+        self._s3_session = requests.Session()
+        self._s3_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        
         # Create session for RZN1 service
         if 'rzn1' in tokens and tokens['rzn1']:
             session = requests.Session()
+            # Mount a pooled adapter so TCP+TLS connections are reused across calls
+            adapter = HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=Retry(
+                    total=5,
+                    connect=3,
+                    read=3,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET', 'POST', 'HEAD'])
+                )
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
             # Use the dynamically generated token from authentication
             session.headers.update({
                 'Authorization': tokens['rzn1'],  # Use the actual token from auth
-                'warehouse': RZN1_WAREHOUSE
+                'warehouse': RZN1_WAREHOUSE,
+                'Connection': 'keep-alive'
             })
+            # Re-authenticate and replay once when the token expires mid-run
+            session.hooks['response'].append(self._refresh_token_on_401)
             self.sessions['rzn1'] = session
-            logger.info(f"Initialized RZN1 session with warehouse: {RZN1_WAREHOUSE}")
-            logger.info(f"Using token: {tokens['rzn1'][:20]}...")  # Log first 20 chars for verification
+            self._prepare_reports_request('rzn1')
+            logger.info("Initialized RZN1 session with warehouse: %s", RZN1_WAREHOUSE)
+            logger.info("Using token: %s...", tokens['rzn1'][:20])  # Log first 20 chars for verification
         else:
             raise ValueError("RZN1 token is required")
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def close(self):
+        """Close all sessions and release their pooled connections"""
+        for session in self.sessions.values():
+            session.close()
+        self._s3_session.close()
+        # Make sure get_client never hands out a closed client
+        global _shared_client, _shared_client_key
+        with _shared_client_lock:
+            if _shared_client is self:
+                _shared_client = None
+                _shared_client_key = None
+    
+    def _refresh_token_on_401(self, response, *args, **kwargs):
+        """
+        Response hook: on 401 fetch a fresh RZN1 token and resend the request once
+        """
+        if response.status_code != 401 or getattr(response.request, '_token_refreshed', False):
+            return response
+        
+        token = self.tokens['rzn1']
+        if response.request.headers.get('Authorization') == token:
+            logger.warning("RZN1 request returned 401, refreshing auth token")
+            invalidate_token('rzn1')
+            token = get_auth_token('rzn1')
+        # Otherwise another request already refreshed the token; just replay with it
+        self.tokens['rzn1'] = token
+        self.sessions['rzn1'].headers['Authorization'] = token
+        # The prepared reports-list request captured the old header
+        self._prepare_reports_request('rzn1')
+        
+        # Release the connection before replaying on it
+        response.content
+        response.close()
+        
+        request = response.request.copy()
+        request.headers['Authorization'] = token
+        request._token_refreshed = True
+        retried = response.connection.send(request, **kwargs)
+        retried.history.append(response)
+        retried.request = request
+        return retried
+    
+    def _prepare_reports_request(self, service):
+        """
+        Prepare the reports-list GET once so polling skips URL parsing and header merging
+        Must be called again whenever the session headers change
+        """
+        base_url, _, reports_endpoint = self._get_service_config(service)
+        base_url = base_url.rstrip('/')  # Remove trailing slash if present
+        url = f"{base_url}{reports_endpoint}"
+        self._reports_prep[service] = self.sessions[service].prepare_request(requests.Request('GET', url))
+    
     def _get_service_config(self, service):
         """Get configuration for specified service"""
         if service == 'rzn1':
-            return RZN1_BASE_URL, RZN1_ENDPOINTS, RZN1_GET_REPORTS_ENDPOINT
+            return cfg.RZN1_BASE_URL, cfg.RZN1_ENDPOINTS, cfg.RZN1_GET_REPORTS_ENDPOINT
         else:
             raise ValueError("Service must be 'rzn1'")
     
@@ -48,155 +369,40 @@ class DualServiceAPIClient:
         """
         Get yesterday's date in YYYY-MM-DD format
         """
-        yesterday = datetime.now() - timedelta(days=1)
-        return yesterday.strftime("%Y-%m-%d")
+        return _yesterday(datetime.now().toordinal())
     
-    def _get_report_params(self, report_type):
+    def _get_report_params(self, report_type, yesterday=None):
         """
         Get specific parameters for different report types matching the exact curl commands
+        Args:
+            report_type (str): Type of report
+            yesterday (str): Optional precomputed 'From Date' so a batch shares one date
         """
-        yesterday = self._get_yesterday_date()
-        
-        # Warehouse list from the curl command
-        warehouse_list = [
-            "hr009_pla_ls1", "up096_bab_ls1", "up097_ali_ls1", "up098_sag_ls1", 
-            "up099_ban_ls1", "up100_aso_ls1", "up101_ach_ls1", "up102_man_ls1", 
-            "up103_shi_ls1", "up104_der_ls1", "up105_dos_ls1", "up106_miy_ls1", 
-            "up107_jac_ls1", "up108_kum_ls1", "up109_rac_ls1", "up110_lal_hm1", 
-            "up111_bel_hm1", "up112_gos_hm1", "hr007_rjv_ls1", "up061_kur_ls1", 
-            "up083_fat_ls1", "up081_hat_ls1", "up070_tik_ls1", "up064_bha_ls1", 
-            "up054_kur_ls1", "up087_maw_ls1", "up077_bik_ls1", "up076_hai_ls1", 
-            "up073_gbx_ls1", "up069_mah_ls1", "up044_jas_ls1", "up051_has_ls1", 
-            "up067_jag_ls1", "up057_lam_ls1", "up079_bhi_ls1", "up080_tar_ls1", 
-            "up082_mus_ls1", "up090_lko_mat", "up075_ran_ls1", "up043_gau_ls1"
-        ]
+        if yesterday is None:
+            yesterday = self._get_yesterday_date()
         
-        # Report-specific parameters matching exact curl commands
-        if report_type == 'order_summary':
-            return {
-                'id': '100',
-                'columns': [
-                    "Cancelled Order Qty", "OrderStatus", "DispatchType", "WAC", "Created By", 
-                    "Order Reference", "Order Date", "Cancelled By", "Cancelled By User", 
-                    "Customer Name", "Customer GST", "Customer Phone Number", "Order Type", 
-                    "Slot From", "Slot To", "SKU Desc", "SKU Code", "SKU Category", 
-                    "SKU Sub Category", "SKU Weight", "SKU Brand", "Order Qty", "Mrp", 
-                    "Unit Price", "Discount", "Customer Po Number", "OrderAmount(w/o-Tax)", 
-                    "CGST", "IGST", "SGST", "CESS", "OrderTaxAmount", "TotalOrderAmount", 
-                    "Shipping Taxable Amt", "ShippingTaxAmount", "Price", 
-                    "Drop Ship PO Reference", "Currency", "Payment Mode", "Invoice Number", 
-                    "Challan number", "UnfulfilledQuantity", "InvoiceAmount", 
-                    "InvoiceAmount(w/o-tax)", "InvoiceTaxAmount", "InvoiceCGSTAmount", 
-                    "InvoiceSGSTAmount", "InvoiceIGSTAmount", "InvoiceCESSAmount", 
-                    "InvoiceDate", "PicklistConfirmationDate", "Margin Amt", 
-                    "Invoice_quantity", "TotalProcurementPrice", "ProcurementPrice", 
-                    "Picklist Details", "Order Fields", "ShippingAmount", "Order_Hold_Status"
-                ],
-                'Warehouse': warehouse_list,
-                'From Date': yesterday,
-                'To Date': '',
-                'Order Reference': '',
-                'Customer Name': '',
-                'Order Type': '',
-                'SKU Code': ''
-            }
-        elif report_type == 'sales_return':
-            return {
-                'id': '95',
-                'columns': [
-                    "Order Reference", "Order Date", "Customer Id", "Customer Name", 
-                    "Customer Pincode", "Customer Country", "Invoice / Challan Number", 
-                    "Invoice Date", "Return Id", "Reference Type", "Return Type", 
-                    "Return Date", "Credit Note Date", "Credit Note Number", "Sku Code", 
-                    "Sku Reference", "Sku Description", "Sku Category", "Sku Sub Category", 
-                    "Sku Brand", "Weight", "Unit Price", "HSN Code", "Quantity", 
-                    "CreditNoteAmount(w/o-tax)", "CGST", "SGST", "IGST", "CESS", 
-                    "SGSTAmount", "IGSTAmount", "CESSAmount", "TaxPercentage", 
-                    "CreditNoteTaxAmount", "TotalCreditNoteAmount", "Accepted User", 
-                    "Customer State", "Customer GST Number", "GST Number", "Reason", 
-                    "ExtraFields", "CGSTAmount"
-                ],
-                'Warehouse': warehouse_list,
-                'Order Reference': '',
-                'Customer Id': '',
-                'Invoice / Challan Number': '',
-                'Return Id': '',
-                'Reference Type': '',
-                'Credit Note Number': '',
-                'Sku Code': '',
-                'From Date': yesterday,
-                'To Date': ''
-            }
-        elif report_type == 'batch_level_inventory':
-            return {
-                'id': '13',
-                'columns': [
-                    "SKU Code", "SKU Reference", "SKU Category", "SKU Sub Category", 
-                    "SKU Brand", "Product Description", "SKU Class", "Status", 
-                    "Batch No", "Manufactured Date", "Expiry Date", "MRP", "Price", 
-                    "Vendor Batch No", "Restest Date", "Re-evaluation Date", 
-                    "Best Before Date", "Inspection Lot Number", "Weight", 
-                    "Batch Reference", "Zone", "Location", "Total Quantity", 
-                    "Reserved_Quantity", "Available Quantity"
-                ],
-                'Warehouse': [RZN1_WAREHOUSE],  # Single warehouse for batch inventory
-                'SKU Code': '',
-                'SKU Category': '',
-                'Zone': '',
-                'Location': ''
-            }
-        elif report_type == 'open_order_summary':
-            return {
-                'id': '145',
-                'columns': [
-                    "Cancelled Order Qty", "OrderStatus", "Created By", "Order Reference", 
-                    "Order Date", "Cancelled By", "Cancelled By User", "Customer Name", 
-                    "Customer GST", "Customer Phone Number", "Order Type", "Slot From", 
-                    "Slot To", "SKU Desc", "SKU Code", "SKU Category", "SKU Sub Category", 
-                    "SKU Weight", "SKU Brand", "Order Qty", "Mrp", "Unit Price", 
-                    "Customer Po Number", "Customer Reference", "Open Order quantity", 
-                    "Allocation Details"
-                ],
-                'Warehouse': [RZN1_WAREHOUSE],  # Single warehouse for open orders
-                'From Date': "2025-09-01",  # Use specific date like in curl
-                'To Date': '',
-                'Order Reference': '',
-                'Customer Name': '',
-                'Order Type': '',
-                'SKU Code': ''
-            }
-        elif report_type == 'closing_stock':
-            return {
-                'id': '13',  # Same as batch level inventory but for all warehouses
-                'columns': [
-                    "SKU Code", "SKU Reference", "SKU Category", "SKU Sub Category", 
-                    "SKU Brand", "Product Description", "SKU Class", "Status", 
-                    "Batch No", "Manufactured Date", "Expiry Date", "MRP", "Price", 
-                    "Vendor Batch No", "Restest Date", "Re-evaluation Date", 
-                    "Best Before Date", "Inspection Lot Number", "Weight", 
-                    "Batch Reference", "Zone", "Location", "Total Quantity", 
-                    "Reserved_Quantity", "Available Quantity"
-                ],
-                'Warehouse': warehouse_list,  # All warehouses for closing stock
-                'SKU Code': '',
-                'SKU Category': '',
-                'Zone': '',
-                'Location': ''
-            }
-        else:
+        template = _REPORT_PARAMS.get(report_type)
+        if template is None:
             # Default parameters for other report types
             return {
                 'From Date': yesterday,
                 'To Date': ''
             }
+        
+        # Copy so custom_params overrides never touch the shared template
+        params = dict(template)
+        if report_type in _YESTERDAY_REPORTS:
+            params['From Date'] = yesterday
+        return params
     
-    def generate_report(self, service, report_type, custom_params=None):
+    def generate_report(self, service, report_type, custom_params=None, yesterday=None):
         """
         Generate a report for the specified service and type
         Args:
             service (str): 'rzn1'
             report_type (str): Type of report to generate
             custom_params (dict): Optional custom parameters to override defaults
+            yesterday (str): Optional precomputed 'From Date' (YYYY-MM-DD)
         Returns:
             bool: True if report generation was successful
         """
@@ -209,138 +415,198 @@ class DualServiceAPIClient:
         url = f"{base_url}{endpoint}"
         
         # Get default parameters for this report type
-        params = self._get_report_params(report_type)
+        params = self._get_report_params(report_type, yesterday)
         
         # Override with custom parameters if provided
         if custom_params:
             params.update(custom_params)
+            # Overridden arrays invalidate the pre-serialised JSON from the template
+            if 'columns' in custom_params:
+                params.pop('_columns_json', None)
+            if 'Warehouse' in custom_params:
+                params.pop('_warehouse_json', None)
         
         try:
-            logger.info(f"Generating {report_type} report for {service.upper()}...")
-            logger.info(f"Using URL: {url}")
+            logger.info("Generating %s report for %s...", report_type, service.upper())
+            logger.info("Using URL: %s", url)
             
-            if report_type in ['order_summary', 'sales_return', 'closing_stock', 'batch_level_inventory', 'open_order_summary']:
-                # Build the exact URL as in the curl command - arrays must be JSON strings
-                # Use separators to remove spaces from JSON (to match curl format)
-                columns_json = json.dumps(params['columns'], separators=(',', ':'))
-                warehouse_json = json.dumps(params['Warehouse'], separators=(',', ':'))
-                
-                # Build parameters exactly as in curl
+            spec = _REPORT_SPECS.get(report_type)
+            if spec is not None:
+                # Build parameters exactly as in curl - arrays are sent as compact JSON strings
                 url_params = {
                     'id': params['id'],
-                    'columns': columns_json,
-                    'Warehouse': warehouse_json,
+                    'columns': params.get('_columns_json') or _compact_json(params['columns']),
+                    'Warehouse': params.get('_warehouse_json') or _compact_json(params['Warehouse']),
                 }
                 
-                # Add date parameters for order_summary and sales_return
-                if report_type in ['order_summary', 'sales_return']:
-                    url_params.update({
-                        'From Date': params['From Date'],
-                        'To Date': params.get('To Date', ''),
-                    })
-                
-                # Add report-specific parameters
-                if report_type == 'order_summary':
-                    url_params.update({
-                        'Order Reference': params.get('Order Reference', ''),
-                        'Customer Name': params.get('Customer Name', ''),
-                        'Order Type': params.get('Order Type', ''),
-                        'SKU Code': params.get('SKU Code', '')
-                    })
-                elif report_type == 'sales_return':
-                    url_params.update({
-                        'Order Reference': params.get('Order Reference', ''),
-                        'Customer Id': params.get('Customer Id', ''),
-                        'Invoice / Challan Number': params.get('Invoice / Challan Number', ''),
-                        'Return Id': params.get('Return Id', ''),
-                        'Reference Type': params.get('Reference Type', ''),
-                        'Credit Note Number': params.get('Credit Note Number', ''),
-                        'Sku Code': params.get('Sku Code', '')
-                    })
-                elif report_type == 'closing_stock':
-                    url_params.update({
-                        'SKU Code': params.get('SKU Code', ''),
-                        'SKU Category': params.get('SKU Category', ''),
-                        'Zone': params.get('Zone', ''),
-                        'Location': params.get('Location', '')
-                    })
-                elif report_type == 'batch_level_inventory':
-                    url_params.update({
-                        'SKU Code': params.get('SKU Code', ''),
-                        'SKU Category': params.get('SKU Category', ''),
-                        'Zone': params.get('Zone', ''),
-                        'Location': params.get('Location', '')
-                    })
-                elif report_type == 'open_order_summary':
-                    url_params.update({
-                        'From Date': params['From Date'],
-                        'To Date': params.get('To Date', ''),
-                        'Order Reference': params.get('Order Reference', ''),
-                        'Customer Name': params.get('Customer Name', ''),
-                        'Order Type': params.get('Order Type', ''),
-                        'SKU Code': params.get('SKU Code', '')
-                    })
+                if spec['use_date']:
+                    url_params['From Date'] = params['From Date']
+                    url_params['To Date'] = params.get('To Date', '')
                 
-                # Build query string with proper encoding
-                url_parts = []
-                for key, value in url_params.items():
-                    if value or value == '':  # Include empty strings as in curl
-                        url_parts.append(f"{key}={quote(str(value))}")
+                # Add report-specific filter fields
+                for field in spec['extra_fields']:
+                    url_params[field] = params.get(field, '')
                 
-                query_string = '&'.join(url_parts)
-                full_url = f"{url}?{query_string}"
-                
-                logger.info(f"Making GET request to: {full_url[:200]}...")  # Log first 200 chars
-                
-                # Make GET request as per curl command
-                response = self.sessions[service].get(full_url)
+                # Let requests encode the query string (empty strings are kept as in curl)
+                response = self.sessions[service].get(url, params=url_params)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Made GET request to: %s...", response.url[:200])  # Log first 200 chars
                 
             else:
                 # For other report types, use similar approach or adapt as needed
                 logger.info("Using JSON POST approach for other report types")
-                response = self.sessions[service].post(url, json=params)
+                response = self.sessions[service].post(
+                    url,
+                    data=orjson.dumps(params),
+                    headers={'Content-Type': 'application/json'}
+                )
             response.raise_for_status()
             
-            logger.info(f"Successfully initiated {report_type} report generation for {service.upper()}")
-            logger.info(f"Response status: {response.status_code}")
+            # A new report is being generated, so any cached listing is now stale
+            self.invalidate_reports_cache(service)
             
-            # Log response if it's JSON
-            try:
-                response_data = response.json()
-                logger.info(f"Response data: {response_data}")
-            except:
-                logger.info(f"Response text: {response.text[:500]}")  # First 500 chars
+            logger.info("Successfully initiated %s report generation for %s", report_type, service.upper())
+            logger.info("Response status: %s", response.status_code)
+            
+            # Log response if it's JSON; the body is only decoded for debug output
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    logger.debug("Response data: %s", orjson.loads(response.content))
+                except orjson.JSONDecodeError:
+                    logger.debug("Response text: %s", response.text[:500])  # First 500 chars
             
             return True
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error generating {report_type} report for {service}: {str(e)}")
+            logger.error("Error generating %s report for %s: %s", report_type, service, e)
             if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"Response status: {e.response.status_code}")
-                logger.error(f"Response content: {e.response.text}")
+                logger.error("Response status: %s", e.response.status_code)
+                logger.error("Response content: %s", e.response.text)
             raise
     
-    def get_available_reports(self, service):
+    def generate_reports_batch(self, service, report_types):
+        """
+        Generate several reports concurrently over the shared session pool
+        Args:
+            service (str): 'rzn1'
+            report_types (list): Report types to generate
+        Returns:
+            dict: Mapping of report_type to True if generation was requested, False if it failed
+        """
+        if not report_types:
+            return {}
+        
+        # One date for the whole batch so reports never straddle midnight
+        yesterday = self._get_yesterday_date()
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(GENERATE_WORKERS, len(report_types))) as executor:
+            futures = {
+                executor.submit(self.generate_report, service, report_type, None, yesterday): report_type
+                for report_type in report_types
+            }
+            for future in as_completed(futures):
+                report_type = futures[future]
+                try:
+                    results[report_type] = future.result()
+                except Exception as e:
+                    # One failing report type must not abort the rest of the batch
+                    logger.error("Failed to generate %s for %s: %s", report_type, service.upper(), e)
+                    results[report_type] = False
+        return results
+    
+    def invalidate_reports_cache(self, service=None):
+        """
+        Drop the cached reports list so the next lookup hits the API
+        Args:
+            service (str): Service to invalidate, or None for all services
+        """
+        with self._reports_cache_lock:
+            if service is None:
+                self._reports_cache.clear()
+            else:
+                self._reports_cache.pop(service, None)
+    
+    def get_available_reports(self, service, force_refresh=False):
         """
         Get list of available reports for the specified service
+        Results are cached for reports_cache_ttl seconds so sequential downloads
+        share one listing call
         Args:
             service (str): 'rzn1'
+            force_refresh (bool): Bypass the cache (e.g. when polling for new reports)
         Returns:
             list: List of available report links
         """
-        base_url, _, reports_endpoint = self._get_service_config(service)
-        base_url = base_url.rstrip('/')  # Remove trailing slash if present
-        url = f"{base_url}{reports_endpoint}"
+        return self._get_cached_reports(service, force_refresh)[1]
+    
+    def get_reports_index(self, service, force_refresh=False):
+        """
+        Get the reports list as (lowercase name, lowercase status, report) tuples
+        The index is built once per fetched listing and cached alongside it
+        """
+        return self._get_cached_reports(service, force_refresh)[2]
+    
+    def _get_cached_reports(self, service, force_refresh=False):
+        """
+        Return the (fetched_at, reports, index) cache entry, refreshing it if expired
+        """
+        with self._reports_cache_lock:
+            cached = self._reports_cache.get(service)
+        if not force_refresh and cached and time.monotonic() - cached[0] < self._reports_cache_ttl:
+            logger.info("Using cached reports list for %s (%s reports)", service.upper(), len(cached[1]))
+            return cached
         
+        reports = self._fetch_available_reports(service)
+        if cached and cached[1] is reports:
+            # Conditional GET returned the same listing, so the index is still valid
+            index = cached[2]
+        else:
+            index = [
+                (report.get('name', '').lower(), report.get('status', '').lower(), report)
+                for report in reports
+            ]
+        entry = (time.monotonic(), reports, index)
+        with self._reports_cache_lock:
+            self._reports_cache[service] = entry
+        return entry
+    
+    @staticmethod
+    def _find_completed_by_name(index, report_name_pattern):
+        """
+        Find the first completed report with a download link whose name contains the pattern
+        """
+        pattern = report_name_pattern.lower()
+        for name, status, report in index:
+            if pattern in name and status == 'completed' and report.get('generated_file'):
+                return report
+        return None
+    
+    def _fetch_available_reports(self, service):
+        """
+        Fetch the reports list for the specified service from the API
+        """
         try:
-            logger.info(f"Fetching available reports for {service.upper()}...")
-            response = self.sessions[service].get(url)
-            response.raise_for_status()
+            logger.info("Fetching available reports for %s...", service.upper())
+            prepared = self._reports_prep[service]
+            etag = self._etags.get(service)
+            if etag and service in self._last_lists:
+                prepared = prepared.copy()
+                prepared.headers['If-None-Match'] = etag
+            session = self.sessions[service]
+            # send() skips the environment merge session.get does, so pick up
+            # HTTPS_PROXY / REQUESTS_CA_BUNDLE and friends explicitly
+            settings = session.merge_environment_settings(prepared.url, {}, None, None, None)
+            response = session.send(prepared, **settings)
+            
+            # Listing unchanged since the last fetch - reuse it without decoding a body
+            if response.status_code == 304:
+                reports = self._last_lists[service]
+                logger.info("Reports list unchanged for %s (%s reports)", service.upper(), len(reports))
+                return reports
             
-            # Log the raw response to understand the structure
-            logger.info(f"Raw response: {response.text[:500]}")
+            response.raise_for_status()
             
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
             
             # Handle different possible response structures
             if isinstance(response_data, list):
@@ -357,13 +623,24 @@ class DualServiceAPIClient:
             else:
                 reports = []
             
-            logger.info(f"Found {len(reports)} available reports for {service.upper()}")
+            new_etag = response.headers.get('ETag')
+            if new_etag:
+                self._etags[service] = new_etag
+                self._last_lists[service] = reports
+            else:
+                self._etags.pop(service, None)
+                self._last_lists.pop(service, None)
+            
+            logger.info("Found %s available reports for %s", len(reports), service.upper())
             return reports
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error getting available reports for {service}: {str(e)}")
+            logger.error("Error getting available reports for %s: %s", service, e)
             if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"Response status: {e.response.status_code}")
-                logger.error(f"Response content: {e.response.text}")
+                logger.error("Response status: %s", e.response.status_code)
+                logger.error("Response content: %s", e.response.text)
+            raise
+        except orjson.JSONDecodeError as e:
+            logger.error("Invalid JSON in reports list for %s: %s", service, e)
             raise
     
     def download_file(self, url, local_path, service=None):
@@ -374,28 +651,75 @@ class DualServiceAPIClient:
             local_path (str): Local path to save the file
             service (str): Service name (not used for S3 downloads)
         """
+        # If this file was already downloaded (e.g. same-day re-run), revalidate it with a
+        # conditional request so a report regenerated at the same URL is never served stale
+        meta_path = local_path + '.meta'
+        tmp_path = local_path + '.part'
+        source = self._download_source(url)
+        conditional_headers = {}
+        if os.path.exists(local_path) and os.path.exists(meta_path):
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                if meta.get('url') == source:
+                    if meta.get('etag'):
+                        conditional_headers['If-None-Match'] = meta['etag']
+                    if meta.get('last_modified'):
+                        conditional_headers['If-Modified-Since'] = meta['last_modified']
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable download metadata %s: %s", meta_path, e)
+        
         try:
-            logger.info(f"Downloading file to {local_path}...")
+            logger.debug("Downloading file to %s...", local_path)
             
             # For S3 URLs, use a direct request without authentication headers
-            # as the URL is pre-signed
+            # as the URL is pre-signed; other URLs use the authenticated session
             if 's3.amazonaws.com' in url:
-                response = requests.get(url, stream=True)
+                session = self._s3_session
             else:
-                # For other URLs, use the authenticated session
-                response = self.sessions[service].get(url, stream=True)
+                session = self.sessions[service]
             
-            response.raise_for_status()
+            # No-op after the first call; covers callers that bypass main.py
+            ensure_temp_dir()
+            
+            # The context manager returns the connection to the pool even when the copy fails
+            with session.get(url, stream=True, headers=conditional_headers) as response:
+                if response.status_code == 304:
+                    logger.info("Reusing previously downloaded %s (not modified)", local_path)
+                    return local_path
+                response.raise_for_status()
+                
+                # Copy the decoded stream in large blocks with the C-level copy loop;
+                # os.sendfile is not usable here since the body arrives over TLS
+                response.raw.decode_content = True
+                # Write to a temporary file and rename on success so a crash never leaves
+                # a truncated report under the final name
+                with open(tmp_path, 'wb', buffering=DOWNLOAD_BUFFER_SIZE) as f:
+                    shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+            os.replace(tmp_path, local_path)
             
-            with open(local_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            with open(meta_path, 'w') as f:
+                json.dump({'url': source, 'etag': etag, 'last_modified': last_modified}, f)
             
-            logger.info(f"Successfully downloaded {local_path}")
+            logger.info("Successfully downloaded %s", local_path)
             return local_path
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error downloading file: {str(e)}")
+            logger.error("Error downloading file: %s", e)
             raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    @staticmethod
+    def _download_source(url):
+        """
+        Identify a download independently of its pre-signed query string,
+        which changes on every listing even for the same generated file
+        """
+        parsed = urlparse(url)
+        return f"{parsed.netloc}{parsed.path}"
     
     def download_report_by_name(self, service, report_name_pattern, local_filename):
         """
@@ -407,33 +731,187 @@ class DualServiceAPIClient:
         Returns:
             str: Path to downloaded file or None if not found
         """
-        reports = self.get_available_reports(service)
+        index = self.get_reports_index(service)
         
         # Look for completed reports matching the pattern
-        for report in reports:
-            report_name = report.get('name', '').lower()
-            report_status = report.get('status', '').lower()
+        report = self._find_completed_by_name(index, report_name_pattern)
+        if report:
+            logger.info("Found completed report: %s (ID: %s)", report.get('name'), report.get('id'))
+            logger.info("Created: %s", report.get('creation_date'))
             
-            # Match the pattern and ensure the report is completed
-            if (report_name_pattern.lower() in report_name and 
-                report_status == 'completed'):
-                
-                download_url = report.get('generated_file')
-                if download_url:
-                    logger.info(f"Found completed report: {report.get('name')} (ID: {report.get('id')})")
-                    logger.info(f"Created: {report.get('creation_date')}")
-                    
-                    local_path = os.path.join(TEMP_DOWNLOAD_DIR, local_filename)
-                    return self.download_file(download_url, local_path, service)
+            local_path = os.path.join(TEMP_DOWNLOAD_DIR, local_filename)
+            return self.download_file(report.get('generated_file'), local_path, service)
         
         # If no completed report found, log available reports for debugging
-        logger.info(f"No completed report found matching pattern '{report_name_pattern}'")
+        logger.info("No completed report found matching pattern '%s'", report_name_pattern)
         logger.info("Available reports:")
-        for report in reports[:5]:  # Show first 5 reports
-            logger.info(f"  - {report.get('name')} (Status: {report.get('status')}, ID: {report.get('id')})")
+        for _, _, report in index[:5]:  # Show first 5 reports
+            logger.info("  - %s (Status: %s, ID: %s)", report.get('name'), report.get('status'), report.get('id'))
+        
+        return None
+    
+    def download_reports_by_names(self, service, pairs):
+        """
+        Download several reports concurrently, fetching the reports list only once
+        Args:
+            service (str): 'rzn1'
+            pairs (list): List of (report_name_pattern, local_filename) tuples
+        Returns:
+            dict: Mapping of local_filename to downloaded path (None if not found or failed)
+        """
+        index = self.get_reports_index(service)
+        results = {}
+        jobs = {}
+        
+        for report_name_pattern, local_filename in pairs:
+            match = self._find_completed_by_name(index, report_name_pattern)
+            if match:
+                logger.info("Found completed report: %s (ID: %s) for '%s'", match.get('name'), match.get('id'), report_name_pattern)
+                jobs[local_filename] = match.get('generated_file')
+            else:
+                logger.info("No completed report found matching pattern '%s'", report_name_pattern)
+                results[local_filename] = None
+        
+        if not jobs:
+            return results
+        
+        with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(jobs))) as executor:
+            futures = {
+                executor.submit(self.download_file, url, os.path.join(TEMP_DOWNLOAD_DIR, local_filename), service): local_filename
+                for local_filename, url in jobs.items()
+            }
+            for future in as_completed(futures):
+                local_filename = futures[future]
+                try:
+                    results[local_filename] = future.result()
+                except Exception as e:
+                    logger.error("Error downloading %s: %s", local_filename, e)
+                    results[local_filename] = None
+        
+        return results
+    
+    def _find_latest_completed_report(self, reports, report_name_pattern):
+        """
+        Find the latest completed report matching the name pattern
+        Args:
+            reports (list): Reports list from get_available_reports
+            report_name_pattern (str): Pattern to match in report name
+        Returns:
+            dict: Matching report with the highest ID, or None if not found
+        """
+        matcher = _pattern_matcher(report_name_pattern)
+        matching_reports = [
+            report for report in reports
+            if report.get('status', '').lower() == 'completed'
+            and report.get('generated_file')
+            and matcher(report.get('name', '').lower().replace('_', ' '))
+        ]
+        
+        if not matching_reports:
+            return None
         
+        # Sort by ID (assuming higher ID means more recent) and get the latest
+        return max(matching_reports, key=lambda r: r.get('id', 0))
+    
+    def find_completed_report_for_today(self, service, report_name_pattern):
+        """
+        Find the latest completed report matching the pattern if it was created today
+        Args:
+            service (str): 'rzn1'
+            report_name_pattern (str): Pattern to match in report name
+        Returns:
+            dict: Today's completed report, or None if the latest one is older or missing
+        """
+        latest_report = self._find_latest_completed_report(
+            self.get_available_reports(service), report_name_pattern
+        )
+        if latest_report and self._is_created_today(latest_report):
+            return latest_report
         return None
     
+    @staticmethod
+    def _is_created_today(report):
+        """
+        Check whether a report's creation_date falls on the current local date
+        """
+        created = report.get('creation_date')
+        if not created:
+            return False
+        today = date.today()
+        try:
+            created_at = datetime.fromisoformat(str(created).replace('Z', '+00:00'))
+            if created_at.tzinfo is not None:
+                created_at = created_at.astimezone()
+            return created_at.date() == today
+        except ValueError:
+            # Fall back to the leading YYYY-MM-DD of non-ISO timestamps
+            return str(created)[:10] == today.isoformat()
+    
+    def get_latest_completed_report_ids(self, service, report_name_patterns):
+        """
+        Get the ID of the latest completed report for each pattern, to use as a polling baseline
+        Args:
+            service (str): 'rzn1'
+            report_name_patterns (list): Patterns to match in report names
+        Returns:
+            dict: Mapping of pattern to the latest completed report ID, or None if there is none yet
+        """
+        reports = self.get_available_reports(service, force_refresh=True)
+        baseline_ids = {}
+        for report_name_pattern in report_name_patterns:
+            latest = self._find_latest_completed_report(reports, report_name_pattern)
+            baseline_ids[report_name_pattern] = latest.get('id', 0) if latest else None
+        return baseline_ids
+    
+    def wait_for_reports_ready(self, service, report_name_patterns, baseline_ids, max_wait=POLL_MAX_WAIT):
+        """
+        Poll the reports list with exponential backoff until every pattern has a new completed report
+        A pattern listed n times needs n completed reports newer than its baseline
+        Args:
+            service (str): 'rzn1'
+            report_name_patterns (list): Patterns of the reports that were generated
+            baseline_ids (dict): Pattern to latest completed ID before generation (see get_latest_completed_report_ids)
+            max_wait (float): Maximum seconds to wait
+        Returns:
+            bool: True if all reports completed, False on timeout
+        """
+        needed = Counter(report_name_patterns)
+        deadline = time.monotonic() + max_wait
+        delay = POLL_INITIAL_DELAY
+        
+        while True:
+            reports = self.get_available_reports(service, force_refresh=True)
+            pending = [
+                report_name_pattern for report_name_pattern, count in needed.items()
+                if self._count_completed_since(reports, report_name_pattern, baseline_ids.get(report_name_pattern)) < count
+            ]
+            if not pending:
+                logger.info("All %s generated reports are ready for %s", sum(needed.values()), service.upper())
+                return True
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Timed out waiting for reports matching %s for %s", pending, service.upper())
+                return False
+            
+            logger.info("Waiting for %s report(s) for %s, next check in %.0fs", len(pending), service.upper(), min(delay, remaining))
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, POLL_MAX_DELAY)
+    
+    @staticmethod
+    def _count_completed_since(reports, report_name_pattern, baseline_id):
+        """
+        Count completed, downloadable reports matching the pattern with an ID above baseline_id
+        """
+        matcher = _pattern_matcher(report_name_pattern)
+        return sum(
+            1 for report in reports
+            if report.get('status', '').lower() == 'completed'
+            and report.get('generated_file')
+            and (baseline_id is None or report.get('id', 0) > baseline_id)
+            and matcher(report.get('name', '').lower().replace('_', ' '))
+        )
+    
     def download_latest_completed_report(self, service, report_name_pattern, local_filename):
         """
         Download the latest completed report matching the pattern
@@ -447,54 +925,18 @@ class DualServiceAPIClient:
         reports = self.get_available_reports(service)
         
         # Debug: Log all available reports with their IDs to help identify the correct one
-        logger.info(f"DEBUG: All available reports for pattern '{report_name_pattern}':")
+        logger.info("DEBUG: All available reports for pattern '%s':", report_name_pattern)
         for report in reports[:10]:  # Show first 10 reports
-            logger.info(f"  ID: {report.get('id')}, Name: '{report.get('name')}', Status: {report.get('status')}")
-        
-        # Filter for completed reports matching the pattern
-        matching_reports = []
-        for report in reports:
-            report_name = report.get('name', '').lower()
-            report_status = report.get('status', '').lower()
-            
-            # More flexible pattern matching - handle "order summary" vs "order_summary" 
-            # and "sales return" vs "sales_return"
-            pattern_normalized = report_name_pattern.lower().replace('_', ' ')
-            name_normalized = report_name.replace('_', ' ')
-            
-            # Special handling for different report types with exact matching
-            if pattern_normalized == 'sales return':
-                pattern_matches = ('sales return' in name_normalized and 
-                                 'open' not in name_normalized)  # Exclude "Open" reports
-            elif pattern_normalized == 'order summary':
-                # Exact match for ORDER SUMMARY to avoid confusion with Open Order Summary
-                pattern_matches = (name_normalized == 'order summary' or 
-                                 'order summary' in name_normalized and 
-                                 'open' not in name_normalized)  # Exclude "Open Order Summary"
-            elif pattern_normalized == 'closing stock':
-                # Closing stock generates "Batch Level Inventory Report"
-                pattern_matches = ('batch level inventory' in name_normalized)
-            elif pattern_normalized == 'batch level inventory':
-                pattern_matches = ('batch level inventory' in name_normalized)
-            elif pattern_normalized == 'open order summary':
-                pattern_matches = ('open order summary' in name_normalized)
-            else:
-                pattern_matches = pattern_normalized in name_normalized
-            
-            if (pattern_matches and 
-                report_status == 'completed' and 
-                report.get('generated_file')):
-                matching_reports.append(report)
+            logger.info("  ID: %s, Name: '%s', Status: %s", report.get('id'), report.get('name'), report.get('status'))
         
-        if not matching_reports:
-            logger.warning(f"No completed reports found matching pattern '{report_name_pattern}' for {service.upper()}")
+        latest_report = self._find_latest_completed_report(reports, report_name_pattern)
+        if not latest_report:
+            logger.warning("No completed reports found matching pattern '%s' for %s", report_name_pattern, service.upper())
             return None
         
-        # Sort by ID (assuming higher ID means more recent) and get the latest
-        latest_report = max(matching_reports, key=lambda r: r.get('id', 0))
         
-        logger.info(f"Downloading latest completed report: {latest_report.get('name')} (ID: {latest_report.get('id')})")
-        logger.info(f"Created: {latest_report.get('creation_date')}")
+        logger.info("Downloading latest completed report: %s (ID: %s)", latest_report.get('name'), latest_report.get('id'))
+        logger.info("Created: %s", latest_report.get('creation_date'))
         
         download_url = latest_report.get('generated_file')
         local_path = os.path.join(TEMP_DOWNLOAD_DIR, local_filename)
@@ -514,23 +956,196 @@ class DualServiceAPIClient:
         reports = self.get_available_reports(service)
         
         # Debug: Log all available reports with their IDs to help identify the correct one
-        logger.info(f"DEBUG: Looking for report ID '{report_id}' or name pattern '{report_name_pattern}':")
+        logger.info("DEBUG: Looking for report ID '%s' or name pattern '%s':", report_id, report_name_pattern)
         for report in reports[:10]:  # Show first 10 reports
-            logger.info(f"  ID: {report.get('id')}, Name: '{report.get('name')}', Status: {report.get('status')}")
+            logger.info("  ID: %s, Name: '%s', Status: %s", report.get('id'), report.get('name'), report.get('status'))
         
-        # First, try to find by exact report ID
+        # Single pass: the first completed report with the exact ID wins, otherwise
+        # the name-pattern matches seen along the way are the fallback
+        report_id = str(report_id)
+        matcher = _pattern_matcher(report_name_pattern)
+        id_match = None
+        name_matches = []
         for report in reports:
-            if (str(report.get('id')) == str(report_id) and 
-                report.get('status', '').lower() == 'completed' and 
-                report.get('generated_file')):
+            if report.get('status', '').lower() != 'completed' or not report.get('generated_file'):
+                continue
+            if str(report.get('id')) == report_id:
+                id_match = report
+                break
+            if matcher(report.get('name', '').lower().replace('_', ' ')):
+                name_matches.append(report)
+        
+        if id_match:
+            logger.info("Found completed report by ID: %s (ID: %s)", id_match.get('name'), id_match.get('id'))
+            report = id_match
+        else:
+            # If not found by ID, fall back to name pattern matching
+            logger.warning("No completed report found with ID '%s', trying name pattern '%s'", report_id, report_name_pattern)
+            if not name_matches:
+                logger.warning("No completed reports found matching pattern '%s' for %s", report_name_pattern, service.upper())
+                return None
+            report = max(name_matches, key=lambda r: r.get('id', 0))
+            logger.info("Downloading latest completed report: %s (ID: %s)", report.get('name'), report.get('id'))
+        logger.info("Created: %s", report.get('creation_date'))
+        
+        local_path = os.path.join(TEMP_DOWNLOAD_DIR, local_filename)
+        return self.download_file(report.get('generated_file'), local_path, service)
+
+    async def agenerate_report(self, service, report_type, custom_params=None, yesterday=None):
+        """
+        Coroutine version of generate_report
+        Runs the blocking request in a worker thread so several report types
+        can be generated concurrently with asyncio.gather on the shared session pool
+        """
+        return await asyncio.to_thread(self.generate_report, service, report_type, custom_params, yesterday)
+    
+    async def aget_available_reports(self, service, force_refresh=False):
+        """
+        Coroutine version of get_available_reports
+        """
+        return await asyncio.to_thread(self.get_available_reports, service, force_refresh)
+    
+    async def adownload_file(self, url, local_path, service=None):
+        """
+        Coroutine version of download_file
+        """
+        return await asyncio.to_thread(self.download_file, url, local_path, service)
+    
+    async def download_all_reports(self, service, jobs):
+        """
+        Download the latest completed report for each job concurrently
+        Args:
+            service (str): 'rzn1'
+            jobs (list): List of (report_name_pattern, local_filename) tuples
+        Returns:
+            dict: Mapping of local_filename to downloaded path (None if not found or failed)
+        """
+        reports = await self.aget_available_reports(service)
+        # Bound concurrency to what the connection pool can serve
+        semaphore = asyncio.Semaphore(DOWNLOAD_WORKERS)
+        
+        async def download_one(report_name_pattern, local_filename):
+            report = self._find_latest_completed_report(reports, report_name_pattern)
+            if not report:
+                logger.warning("No completed reports found matching pattern '%s' for %s", report_name_pattern, service.upper())
+                return None
+            local_path = os.path.join(TEMP_DOWNLOAD_DIR, local_filename)
+            async with semaphore:
+                try:
+                    return await self.adownload_file(report.get('generated_file'), local_path, service)
+                except Exception as e:
+                    logger.error("Error downloading %s: %s", local_filename, e)
+                    return None
+        
+        paths = await asyncio.gather(*[download_one(pattern, filename) for pattern, filename in jobs])
+        return {filename: path for (_, filename), path in zip(jobs, paths)}
+    
+    def download_all_reports_sync(self, service, jobs):
+        """
+        Blocking wrapper around download_all_reports for synchronous callers
+        """
+        return asyncio.run(self.download_all_reports(service, jobs))
+    
+    async def run_all(self, jobs, max_wait=POLL_MAX_WAIT):
+        """
+        Generate all reports at once, then download each as soon as it is ready
+        Args:
+            jobs (list): List of (service, report_type, report_name_pattern, local_filename) tuples
+            max_wait (float): Maximum seconds to wait for any single report
+        Returns:
+            dict: Mapping of local_filename to downloaded path (None if not ready or failed)
+        """
+        # Remember the latest completed report per job so only newly generated ones are picked up
+        # One fresh listing per distinct service serves every job on it
+        listings = {
+            service: await self.aget_available_reports(service, force_refresh=True)
+            for service in {job[0] for job in jobs}
+        }
+        baselines = {}
+        for service, _, report_name_pattern, local_filename in jobs:
+            latest = self._find_latest_completed_report(listings[service], report_name_pattern)
+            baselines[local_filename] = latest.get('id', 0) if latest else None
+        
+        yesterday = self._get_yesterday_date()
+        generated = await asyncio.gather(
+            *[self.agenerate_report(service, report_type, yesterday=yesterday) for service, report_type, _, _ in jobs],
+            return_exceptions=True
+        )
+        
+        tasks = []
+        results = {}
+        for job, outcome in zip(jobs, generated):
+            service, report_type, report_name_pattern, local_filename = job
+            if isinstance(outcome, Exception):
+                logger.error("Failed to generate %s for %s: %s", report_type, service.upper(), outcome)
+                results[local_filename] = None
+                continue
+            tasks.append(asyncio.create_task(self._await_and_download(
+                service, report_name_pattern, local_filename, baselines[local_filename], max_wait
+            )))
+        
+        for future in asyncio.as_completed(tasks):
+            local_filename, local_path = await future
+            results[local_filename] = local_path
+        
+        return results
+    
+    async def _await_and_download(self, service, report_name_pattern, local_filename, baseline_id, max_wait):
+        """
+        Poll with exponential backoff until a report newer than baseline_id completes, then download it
+        Returns:
+            tuple: (local_filename, downloaded path or None)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+        delay = POLL_INITIAL_DELAY
+        
+        try:
+            while True:
+                reports = await self.aget_available_reports(service, force_refresh=True)
+                latest = self._find_latest_completed_report(reports, report_name_pattern)
+                if latest and (baseline_id is None or latest.get('id', 0) > baseline_id):
+                    logger.info("Report ready: %s (ID: %s)", latest.get('name'), latest.get('id'))
+                    local_path = os.path.join(TEMP_DOWNLOAD_DIR, local_filename)
+                    return local_filename, await self.adownload_file(latest.get('generated_file'), local_path, service)
                 
-                download_url = report.get('generated_file')
-                logger.info(f"Found completed report by ID: {report.get('name')} (ID: {report.get('id')})")
-                logger.info(f"Created: {report.get('creation_date')}")
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.warning("Timed out waiting for report matching '%s' for %s", report_name_pattern, service.upper())
+                    return local_filename, None
                 
-                local_path = os.path.join(TEMP_DOWNLOAD_DIR, local_filename)
-                return self.download_file(download_url, local_path, service)
-        
-        # If not found by ID, fall back to name pattern matching
-        logger.warning(f"No completed report found with ID '{report_id}', trying name pattern '{report_name_pattern}'")
-        return self.download_latest_completed_report(service, report_name_pattern, local_filename)
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, POLL_MAX_DELAY)
+        except Exception as e:
+            logger.error("Error waiting for %s: %s", local_filename, e)
+            return local_filename, None
+
+
+# Client handed out by get_client, and the token set it was built for
+_shared_client = None
+_shared_client_key = None
+# Guards the shared client against concurrent get_client/close calls
+_shared_client_lock = threading.Lock()
+
+def get_client(tokens):
+    """
+    Get the shared API client for the given tokens
+    Callers should use this instead of instantiating DualServiceAPIClient per report,
+    so the keep-alive connection pool persists across all report workflows
+    Args:
+        tokens (dict): Dictionary with 'rzn1' token
+    Returns:
+        DualServiceAPIClient: Client reused for as long as the tokens are unchanged
+    """
+    global _shared_client, _shared_client_key
+    key = tuple(sorted(tokens.items()))
+    with _shared_client_lock:
+        if _shared_client is not None and _shared_client_key == key:
+            return _shared_client
+        previous = _shared_client
+        client = _shared_client = DualServiceAPIClient(dict(tokens))
+        _shared_client_key = key
+    # Tokens changed: release the replaced client's pooled connections
+    if previous is not None:
+        previous.close()
+    return client
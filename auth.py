@@ -1,24 +1,140 @@
+import os
+import json
+import time
+import threading
+import orjson
 import requests
-from config import (
-    RZN1_BASE_URL, RZN1_AUTH_ENDPOINT, RZN1_CLIENT_ID, RZN1_CLIENT_SECRET, RZN1_AUTHORIZATION_TOKEN
-)
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import cfg
 from logger_config import setup_logger, get_default_log_file
 
 # Setup logger
 logger = setup_logger('auth', get_default_log_file('auth'))
 
-def get_auth_token(service='rzn1'):
+# Connect/read timeouts for token requests (seconds)
+AUTH_TIMEOUT = (5, 30)
+
+# Shared session so token requests reuse pooled connections instead of a new TLS handshake each time
+_AUTH_SESSION = requests.Session()
+_AUTH_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        # Token requests are safe to repeat, so POST is retried as well as GET
+        allowed_methods=frozenset(['POST', 'GET']),
+        # Hand the final 5xx response back so raise_for_status logs its body
+        raise_on_status=False
+    )
+))
+
+def get_session():
+    """
+    Get the pooled session used for token requests
+    Returns:
+        requests.Session: Shared unauthenticated session
+    """
+    return _AUTH_SESSION
+
+# Cached tokens this close to expiry are refreshed instead of reused (seconds)
+TOKEN_REFRESH_MARGIN = 60
+# Lifetime assumed for the in-process cache when the response has no expires_in (seconds)
+DEFAULT_TOKEN_LIFETIME = 3600
+
+# In-process token cache: service -> (access_token, expiry on the time.monotonic clock)
+_TOKEN_CACHE = {}
+_TOKEN_LOCK = threading.Lock()
+
+def invalidate_token(service='rzn1'):
+    """
+    Drop the cached token (in-process and on disk) so the next get_auth_token call re-authenticates
+    Args:
+        service (str): Either 'rzn1'
+    """
+    with _TOKEN_LOCK:
+        _TOKEN_CACHE.pop(service, None)
+        if service == 'rzn1':
+            try:
+                os.remove(cfg.RZN1_TOKEN_CACHE_FILE)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not remove cached auth token %s: %s", cfg.RZN1_TOKEN_CACHE_FILE, e)
+
+def _load_cached_token(cache_file):
+    """
+    Return (token, seconds_left) for the on-disk token if it is still valid for
+    TOKEN_REFRESH_MARGIN seconds, otherwise None
+    """
+    try:
+        with open(cache_file) as f:
+            cached = json.load(f)
+        seconds_left = cached['expires_at'] - time.time()
+        if seconds_left > TOKEN_REFRESH_MARGIN:
+            return cached['token'], seconds_left
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+def _save_cached_token(cache_file, token, expires_in):
+    """
+    Persist the access token with its absolute expiry, readable only by the current user
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        fd = os.open(cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'token': token, 'expires_at': time.time() + float(expires_in)}, f)
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning("Could not cache auth token in %s: %s", cache_file, e)
+
+def get_auth_token(service='rzn1', force_refresh=False):
     """
     Get authentication token for specified service
+    A cached token is reused until it is within TOKEN_REFRESH_MARGIN seconds of expiry
     Args:
         service (str): Either 'rzn1'
+        force_refresh (bool): Ignore the cached token and request a new one
     Returns:
         str: Authentication token
     """
+    if service != 'rzn1':
+        raise ValueError("Service must be 'rzn1'")
+    
+    # Serialise lookups so concurrent callers share one token request
+    with _TOKEN_LOCK:
+        now = time.monotonic()
+        if not force_refresh:
+            cached = _TOKEN_CACHE.get(service)
+            if cached and cached[1] - TOKEN_REFRESH_MARGIN > now:
+                return cached[0]
+            
+            cached = _load_cached_token(cfg.RZN1_TOKEN_CACHE_FILE)
+            if cached:
+                logger.info("Using cached auth token for %s service", service.upper())
+                _TOKEN_CACHE[service] = (cached[0], now + cached[1])
+                return cached[0]
+        
+        access_token, expires_in = _request_token(service)
+        _TOKEN_CACHE[service] = (access_token, now + float(expires_in or DEFAULT_TOKEN_LIFETIME))
+        # Only tokens with a known lifetime are cached for later runs
+        if expires_in is not None:
+            _save_cached_token(cfg.RZN1_TOKEN_CACHE_FILE, access_token, expires_in)
+        return access_token
+
+def _request_token(service):
+    """
+    Request a new access token from the OAuth endpoint
+    Returns:
+        tuple: (access_token, expires_in) where expires_in may be None
+    """
     if service == 'rzn1':
-        auth_url = f"{RZN1_BASE_URL}{RZN1_AUTH_ENDPOINT}"
-        client_id = RZN1_CLIENT_ID
-        client_secret = RZN1_CLIENT_SECRET
+        auth_url = f"{cfg.RZN1_BASE_URL}{cfg.RZN1_AUTH_ENDPOINT}"
+        client_id = cfg.RZN1_CLIENT_ID
+        client_secret = cfg.RZN1_CLIENT_SECRET
         
         # Use form data for OAuth token generation
         form_data = {
@@ -28,28 +144,38 @@ def get_auth_token(service='rzn1'):
         }
         
         try:
-            logger.info(f"Generating new auth token for {service.upper()} service...")
-            logger.info(f"Using auth URL: {auth_url}")
-            response = requests.post(auth_url, data=form_data)
-            response.raise_for_status()
+            logger.info("Generating new auth token for %s service...", service.upper())
+            logger.info("Using auth URL: %s", auth_url)
+            response = _AUTH_SESSION.post(auth_url, data=form_data, timeout=AUTH_TIMEOUT)
+            
+            # Decode the body straight from bytes; OAuth errors carry a JSON body too
+            try:
+                token_data = orjson.loads(response.content)
+            except orjson.JSONDecodeError:
+                token_data = {}
+            if not response.ok:
+                if isinstance(token_data, dict) and 'error_description' in token_data:
+                    logger.error("Auth server rejected token request: %s", token_data['error_description'])
+                response.raise_for_status()
+            if not isinstance(token_data, dict):
+                raise ValueError(f"Unexpected token response for {service}")
             
-            token_data = response.json()
             access_token = token_data.get('access_token')
             if not access_token:
                 raise ValueError(f"No access_token received in the response for {service}")
             
-            logger.info(f"Successfully generated new token for {service.upper()}")
-            logger.info(f"Token type: {token_data.get('token_type', 'Bearer')}")
-            logger.info(f"Token expires in: {token_data.get('expires_in', 'Unknown')} seconds")
+            logger.info("Successfully generated new token for %s", service.upper())
+            logger.info("Token type: %s", token_data.get('token_type', 'Bearer'))
+            logger.info("Token expires in: %s seconds", token_data.get('expires_in', 'Unknown'))
             
             # Return just the access_token without Bearer prefix as per working curl example
-            return access_token
+            return access_token, token_data.get('expires_in')
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error getting auth token for {service}: {str(e)}")
+            logger.error("Error getting auth token for %s: %s", service, e)
             if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"Response status: {e.response.status_code}")
-                logger.error(f"Response content: {e.response.text}")
+                logger.error("Response status: %s", e.response.status_code)
+                logger.error("Response content: %s", e.response.text)
             raise
     else:
         raise ValueError("Service must be 'rzn1'")
@@ -65,5 +191,5 @@ def get_both_tokens():
         tokens['rzn1'] = get_auth_token('rzn1')
         return tokens
     except Exception as e:
-        logger.error(f"Failed to get tokens: {str(e)}")
+        logger.error("Failed to get tokens: %s", e)
         raise
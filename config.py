@@ -1,50 +1,132 @@
 import os
+import functools
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import date
+
+# Set once the .env file has been applied; child processes inherit it and skip the parse
+ENV_LOADED_SENTINEL = 'WMS_ENV_LOADED'
+
+@functools.lru_cache(maxsize=1)
+def load_env():
+    """Load environment variables from .env once per process tree"""
+    if os.environ.get(ENV_LOADED_SENTINEL) != '1':
+        load_dotenv()
+        os.environ[ENV_LOADED_SENTINEL] = '1'
 
 # Load environment variables from .env file
-load_dotenv()
-
-# RZN1 Service Configuration
-RZN1_BASE_URL = os.getenv('RZN1_BASE_URL', 'https://rzn1-be.stockone.com')
-RZN1_AUTH_ENDPOINT = os.getenv('RZN1_AUTH_ENDPOINT', '/o/token/')
-RZN1_CLIENT_ID = os.getenv('RZN1_CLIENT_ID')
-RZN1_CLIENT_SECRET = os.getenv('RZN1_CLIENT_SECRET')
-RZN1_GET_REPORTS_ENDPOINT = os.getenv('RZN1_GET_REPORTS_ENDPOINT', '/api/v1/reports/generatedReports/')
-RZN1_AUTHORIZATION_TOKEN = os.getenv('RZN1_AUTHORIZATION_TOKEN', 'Q4THFcPJzdkzlae71bUByw6sdE9dcl')
-RZN1_WAREHOUSE = os.getenv('RZN1_WAREHOUSE', 'up108_kum_ls1')
-
-# API Endpoints for RZN1
-RZN1_ENDPOINTS = {
-    'order_summary': os.getenv('RZN1_ORDER_SUMMARY_ENDPOINT', '/api/v1/reports/generate-report/'),
-    'sales_return': os.getenv('RZN1_SALES_RETURN_ENDPOINT', '/api/v1/reports/generate-report/'),
-    'batch_level_inventory': os.getenv('RZN1_INVENTORY_SUMMARY_ENDPOINT', '/api/v1/reports/generate-report/'),
-    'open_order_summary': os.getenv('RZN1_INVENTORY_SUMMARY_ENDPOINT', '/api/v1/reports/generate-report/'),
-    'closing_stock': os.getenv('RZN1_CLOSING_STOCK_ENDPOINT', '/api/v1/reports/generate-report/')
-}
-
-# API Endpoints for RZN
-RZN_ENDPOINTS = {
-    'order_summary': os.getenv('RZN_ORDER_SUMMARY_ENDPOINT', '/order-summary'),
-    'sales_return': os.getenv('RZN_SALES_RETURN_ENDPOINT', '/sales-return'),
-    'fdb_inventory': os.getenv('RZN_FDB_INVENTORY_ENDPOINT', '/fdb-inventory'),
-    'fdb_open_orders': os.getenv('RZN_FDB_OPEN_ORDERS_ENDPOINT', '/fdb-open-orders'),
-    'rbl_inventory': os.getenv('RZN_RBL_INVENTORY_ENDPOINT', '/rbl-inventory'),
-    'store_inventory': os.getenv('RZN_STORE_INVENTORY_ENDPOINT', '/store-inventory')
-}
-
-# AWS Configuration
-AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
-AWS_REGION = os.getenv('AWS_REGION', 'ap-south-1')
-S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME', os.getenv('BUCKET_NAME', 'wms-rozana'))
+load_env()
+
+class Config:
+    """
+    Environment-backed settings, each read with os.getenv on first access and cached
+    """
+    # RZN1 Service Configuration
+    @functools.cached_property
+    def RZN1_BASE_URL(self):
+        return os.getenv('RZN1_BASE_URL', 'https://rzn1-be.stockone.com')
+    
+    @functools.cached_property
+    def RZN1_AUTH_ENDPOINT(self):
+        return os.getenv('RZN1_AUTH_ENDPOINT', '/o/token/')
+    
+    @functools.cached_property
+    def RZN1_CLIENT_ID(self):
+        return os.getenv('RZN1_CLIENT_ID')
+    
+    @functools.cached_property
+    def RZN1_CLIENT_SECRET(self):
+        return os.getenv('RZN1_CLIENT_SECRET')
+    
+    @functools.cached_property
+    def RZN1_GET_REPORTS_ENDPOINT(self):
+        return os.getenv('RZN1_GET_REPORTS_ENDPOINT', '/api/v1/reports/generatedReports/')
+    
+    @functools.cached_property
+    def RZN1_AUTHORIZATION_TOKEN(self):
+        return os.getenv('RZN1_AUTHORIZATION_TOKEN', 'Q4THFcPJzdkzlae71bUByw6sdE9dcl')
+    
+    @functools.cached_property
+    def RZN1_WAREHOUSE(self):
+        return os.getenv('RZN1_WAREHOUSE', 'up108_kum_ls1')
+    
+    @functools.cached_property
+    def RZN1_REPORTS_CACHE_TTL(self):
+        return float(os.getenv('RZN1_REPORTS_CACHE_TTL', '30'))
+    
+    @functools.cached_property
+    def RZN1_TOKEN_CACHE_FILE(self):
+        return os.getenv(
+            'RZN1_TOKEN_CACHE_FILE', os.path.join(os.path.expanduser('~'), '.cache', 'wms', 'rzn1_token.json')
+        )
+    
+    # API Endpoints for RZN1
+    @functools.cached_property
+    def RZN1_ENDPOINTS(self):
+        return {
+            'order_summary': os.getenv('RZN1_ORDER_SUMMARY_ENDPOINT', '/api/v1/reports/generate-report/'),
+            'sales_return': os.getenv('RZN1_SALES_RETURN_ENDPOINT', '/api/v1/reports/generate-report/'),
+            'batch_level_inventory': os.getenv('RZN1_INVENTORY_SUMMARY_ENDPOINT', '/api/v1/reports/generate-report/'),
+            'open_order_summary': os.getenv('RZN1_INVENTORY_SUMMARY_ENDPOINT', '/api/v1/reports/generate-report/'),
+            'closing_stock': os.getenv('RZN1_CLOSING_STOCK_ENDPOINT', '/api/v1/reports/generate-report/')
+        }
+    
+    # API Endpoints for RZN
+    @functools.cached_property
+    def RZN_ENDPOINTS(self):
+        return {
+            'order_summary': os.getenv('RZN_ORDER_SUMMARY_ENDPOINT', '/order-summary'),
+            'sales_return': os.getenv('RZN_SALES_RETURN_ENDPOINT', '/sales-return'),
+            'fdb_inventory': os.getenv('RZN_FDB_INVENTORY_ENDPOINT', '/fdb-inventory'),
+            'fdb_open_orders': os.getenv('RZN_FDB_OPEN_ORDERS_ENDPOINT', '/fdb-open-orders'),
+            'rbl_inventory': os.getenv('RZN_RBL_INVENTORY_ENDPOINT', '/rbl-inventory'),
+            'store_inventory': os.getenv('RZN_STORE_INVENTORY_ENDPOINT', '/store-inventory')
+        }
+    
+    # AWS Configuration
+    @functools.cached_property
+    def AWS_ACCESS_KEY_ID(self):
+        return os.getenv('AWS_ACCESS_KEY_ID')
+    
+    @functools.cached_property
+    def AWS_SECRET_ACCESS_KEY(self):
+        return os.getenv('AWS_SECRET_ACCESS_KEY')
+    
+    @functools.cached_property
+    def AWS_REGION(self):
+        return os.getenv('AWS_REGION', 'ap-south-1')
+    
+    @functools.cached_property
+    def S3_BUCKET_NAME(self):
+        return os.getenv('S3_BUCKET_NAME', os.getenv('BUCKET_NAME', 'wms-rozana'))
+
+# Shared settings instance; import this rather than the individual names
+cfg = Config()
+
+def __getattr__(name):
+    """Keep `from config import RZN1_BASE_URL` style imports working, resolved lazily via cfg"""
+    if isinstance(getattr(Config, name, None), functools.cached_property):
+        return getattr(cfg, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # File Configuration
 TEMP_DOWNLOAD_DIR = 'temp_downloads'
 
+# S3 Client Configuration
+# Retry policy shared by every processor's S3 client
+S3_RETRIES = {'mode': 'adaptive', 'max_attempts': 5}
+
+@functools.lru_cache(maxsize=1)
+def ensure_temp_dir():
+    """Create the temp download directory if it doesn't exist (once per process)"""
+    os.makedirs(TEMP_DOWNLOAD_DIR, exist_ok=True)
+    return TEMP_DOWNLOAD_DIR
+
 def get_date_prefix():
     """Generate date prefix for filenames"""
-    return datetime.now().strftime("%Y%m%d")
+    return _date_prefix(date.today().toordinal())
+
+@functools.lru_cache(maxsize=1)
+def _date_prefix(today_ordinal):
+    """Format the given proleptic ordinal as YYYYMMDD"""
+    return date.fromordinal(today_ordinal).strftime("%Y%m%d")
 
-# Create temp directory if it doesn't exist
-os.makedirs(TEMP_DOWNLOAD_DIR, exist_ok=True)
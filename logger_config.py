@@ -1,10 +1,79 @@
-import logging
 import os
+import sys
+import atexit
+import functools
+import signal
+import queue
+import logging
+import logging.handlers
+import threading
 from datetime import datetime
 
+# Buffer size for log files (bytes); records are flushed in blocks rather than per line
+LOG_BUFFER_SIZE = 64 * 1024
+
+_buffered_handlers = []
+# Background listeners doing the console/file I/O, one per configured logger name
+_listeners = {}
+# Configured loggers by (name, log_file, level), so repeat setup calls reuse the handlers
+_LOGGER_CACHE = {}
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler with a large write buffer
+    The buffer is flushed on WARNING and above, at interpreter exit and on SIGTERM
+    """
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE, encoding=self.encoding)
+    
+    def flush(self):
+        # FileHandler flushes after every record; defer that to the explicit flush points
+        pass
+    
+    def flush_now(self):
+        """Write out any buffered records"""
+        self.acquire()
+        try:
+            if self.stream and hasattr(self.stream, 'flush'):
+                self.stream.flush()
+        finally:
+            self.release()
+    
+    def emit(self, record):
+        super().emit(record)
+        if record.levelno >= logging.WARNING:
+            self.flush_now()
+    
+    def close(self):
+        self.flush_now()
+        super().close()
+
+def _flush_buffered_handlers():
+    for handler in list(_buffered_handlers):
+        handler.flush_now()
+
+def _shutdown_logging():
+    # Drain every queue before flushing, so records still queued reach the files
+    for listener in list(_listeners.values()):
+        listener.stop()
+    _listeners.clear()
+    _flush_buffered_handlers()
+
+def _exit_on_sigterm(signum, frame):
+    # Raise SystemExit so atexit runs and buffered log records reach disk
+    sys.exit(128 + signum)
+
+atexit.register(_shutdown_logging)
+# SIGINT already raises KeyboardInterrupt; only replace the default SIGTERM action
+if (threading.current_thread() is threading.main_thread() and
+        signal.getsignal(signal.SIGTERM) == signal.SIG_DFL):
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
 def setup_logger(name, log_file=None, level=logging.INFO):
     """
     Set up a logger with both console and file handlers
+    The handlers run on a background QueueListener so logging calls never block on I/O;
+    repeat calls with the same arguments return the already configured logger
     
     Args:
         name (str): Logger name
@@ -14,10 +83,27 @@ def setup_logger(name, log_file=None, level=logging.INFO):
     Returns:
         logging.Logger: Configured logger
     """
+    key = (name, log_file or '', level)
+    cached = _LOGGER_CACHE.get(key)
+    if cached is not None:
+        return cached
+    
     logger = logging.getLogger(name)
     logger.setLevel(level)
+    # Our handlers do all output; don't repeat records through a root logger that an
+    # in-process processor may have configured with basicConfig
+    logger.propagate = False
     
-    # Clear existing handlers to avoid duplicates
+    # Clear existing handlers to avoid duplicates, draining the old listener and
+    # writing out anything its file handler still buffers
+    old_listener = _listeners.pop(name, None)
+    if old_listener:
+        old_listener.stop()
+        for handler in old_listener.handlers:
+            if isinstance(handler, BufferedFileHandler):
+                handler.close()
+                if handler in _buffered_handlers:
+                    _buffered_handlers.remove(handler)
     logger.handlers.clear()
     
     # Create formatter with timestamp
@@ -30,7 +116,7 @@ def setup_logger(name, log_file=None, level=logging.INFO):
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # File handler (optional)
     if log_file:
@@ -39,13 +125,26 @@ def setup_logger(name, log_file=None, level=logging.INFO):
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
             
-        file_handler = logging.FileHandler(log_file)
+        file_handler = BufferedFileHandler(log_file)
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+        _buffered_handlers.append(file_handler)
+    
+    # The logger only enqueues records; a background thread does the console and file I/O
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
+    # A different file or level for this name replaces the previous configuration
+    for stale_key in [k for k in _LOGGER_CACHE if k[0] == name]:
+        del _LOGGER_CACHE[stale_key]
+    _LOGGER_CACHE[key] = logger
     return logger
 
+@functools.lru_cache(maxsize=32)
 def get_default_log_file(script_name):
     """Generate default log file path"""
     timestamp = datetime.now().strftime("%Y%m%d")
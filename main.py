@@ -1,18 +1,28 @@
 import os
-import time
+import logging
 import argparse
+import signal
+import importlib
+import contextlib
 import subprocess
+import threading
 import shutil
 from datetime import datetime
-from config import TEMP_DOWNLOAD_DIR, get_date_prefix
+from concurrent.futures import ThreadPoolExecutor
+from config import TEMP_DOWNLOAD_DIR, ensure_temp_dir, get_date_prefix
 from auth import get_both_tokens
-from api_client import DualServiceAPIClient
+from api_client import get_client, DOWNLOAD_WORKERS
 from s3_utils import S3Uploader
 from logger_config import setup_logger, get_default_log_file
 
 # Setup logger
 logger = setup_logger('main', get_default_log_file('main'))
 
+# Processor scripts are killed after this many seconds (30 minutes)
+PROCESSOR_TIMEOUT = 1800
+# Read buffer for streamed processor output (bytes)
+PROCESSOR_OUTPUT_BUFFER = 1024 * 1024
+
 def generate_filename(service, report_type, date_prefix):
     """Generate filename based on service, report type and date"""
     if service == 'rzn1':
@@ -34,57 +44,184 @@ def generate_filename(service, report_type, date_prefix):
         else:
             return f"rzn_{report_type}_{date_prefix}.csv"
 
+# Raw S3 folder per report filename prefix, checked in order; date-specific subfolders
+# are what the processors expect. Closing stock shares the inventory_summary folder
+_S3_ROUTES = (
+    (('OPEN_ORDER_SUMMARY', 'BATCH_LEVEL_INVENTORY', 'CLOSING_STOCK'), 'rzn1/inventory_summary/raw'),
+    (('ORDER_SUMMARY', 'SALES_RETURN'), 'rzn1/order_summary/raw'),
+)
+
+def get_s3_key(filename, date_prefix):
+    """Build the raw S3 key for a downloaded report file"""
+    for prefixes, folder in _S3_ROUTES:
+        if filename.startswith(prefixes):
+            return f"{folder}/{date_prefix}/{filename}"
+    return f"rzn1/raw/{filename}"
+
 def cleanup_temp_files(file_paths):
-    """Clean up temporary files after successful S3 upload"""
+    """Clean up temporary files (and their download metadata) after successful S3 upload"""
     for file_path in file_paths:
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Cleaned up temporary file: {os.path.basename(file_path)}")
-        except Exception as e:
-            logger.error(f"Failed to clean up {file_path}: {str(e)}")
+        # Unlink directly instead of checking existence first: one syscall per file, no race
+        for path in (file_path, file_path + '.meta'):
+            try:
+                os.unlink(path)
+                if path == file_path:
+                    logger.info("Cleaned up temporary file: %s", os.path.basename(file_path))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error("Failed to clean up %s: %s", path, e)
 
-def execute_processor_script(script_name):
-    """Execute a processor script and return success status"""
+def execute_processor_script(script_name, env=None):
+    """
+    Execute a processor script and return success status
+    Args:
+        script_name (str): Processor script to run
+        env (dict): Environment for the child; pass the already-loaded environment so it skips the .env parse
+    """
     try:
-        logger.info(f"Executing {script_name}...")
+        logger.info("Executing %s...", script_name)
         
         # Use the Python executable from the virtual environment
         python_executable = '/home/headrun/wms-crawl-scripts/.venv/bin/python'
         
-        result = subprocess.run(
+        # Stream the child's output through our logger line by line instead of buffering it all
+        process = subprocess.Popen(
             [python_executable, script_name],
             cwd=os.path.dirname(os.path.abspath(__file__)),
-            capture_output=True,
-            text=True,
-            timeout=1800  # 30 minutes timeout
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=PROCESSOR_OUTPUT_BUFFER
         )
         
-        if result.returncode == 0:
-            logger.info(f"Successfully executed {script_name}")
-            if result.stdout:
-                logger.info(f"Output from {script_name}: {result.stdout}")
+        # Reading stdout blocks, so the timeout is enforced by a watchdog that kills the child
+        timed_out = threading.Event()
+        def _kill_on_timeout():
+            timed_out.set()
+            process.kill()
+        watchdog = threading.Timer(PROCESSOR_TIMEOUT, _kill_on_timeout)
+        watchdog.start()
+        try:
+            # Read raw bytes and only decode lines the logger will actually emit
+            log_output = logger.isEnabledFor(logging.INFO)
+            with process.stdout:
+                for raw_line in iter(process.stdout.readline, b''):
+                    if log_output:
+                        logger.info("%s: %s", script_name, raw_line.decode('utf-8', 'replace').rstrip())
+            returncode = process.wait()
+        finally:
+            watchdog.cancel()
+        
+        if timed_out.is_set():
+            logger.error("Timeout executing %s", script_name)
+            return False
+        if returncode == 0:
+            logger.info("Successfully executed %s", script_name)
             return True
         else:
-            logger.error(f"Failed to execute {script_name}. Return code: {result.returncode}")
-            if result.stderr:
-                logger.error(f"Error from {script_name}: {result.stderr}")
+            logger.error("Failed to execute %s. Return code: %s", script_name, returncode)
             return False
             
-    except subprocess.TimeoutExpired:
-        logger.error(f"Timeout executing {script_name}")
+    except Exception as e:
+        logger.error("Exception executing %s: %s", script_name, e)
+        return False
+
+class ProcessorTimeout(BaseException):
+    """
+    Raised when an in-process processor exceeds PROCESSOR_TIMEOUT
+    Derives from BaseException (like KeyboardInterrupt) so the processors' broad except Exception handlers can't swallow it
+    """
+
+def _raise_processor_timeout(signum, frame):
+    raise ProcessorTimeout()
+
+class _LineLogger:
+    """File-like sink that logs each complete line written to it, as the subprocess mode logs child output"""
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._pending = ''
+    
+    def write(self, text):
+        self._pending += text
+        *lines, self._pending = self._pending.split('\n')
+        for line in lines:
+            logger.info("%s: %s", self.prefix, line.rstrip())
+        return len(text)
+    
+    def flush(self):
+        if self._pending:
+            logger.info("%s: %s", self.prefix, self._pending.rstrip())
+            self._pending = ''
+
+@contextlib.contextmanager
+def _capture_processor_output(script_name):
+    """
+    Send an in-process processor's root-logger records and stdout through main's logger,
+    so its output reaches main's log file just like with --isolated-processors
+    """
+    root = logging.getLogger()
+    saved_handlers = root.handlers[:]
+    root.handlers[:] = logger.handlers
+    sink = _LineLogger(script_name)
+    try:
+        with contextlib.redirect_stdout(sink):
+            yield
+    finally:
+        sink.flush()
+        root.handlers[:] = saved_handlers
+
+def run_processor_in_process(script_name):
+    """
+    Import a processor script as a module and call its run() entry point
+    Avoids a fresh interpreter and re-importing pandas/boto3 per processor
+    Args:
+        script_name (str): Processor script, e.g. 'rzn1_order_summary_processor.py'
+    Returns:
+        bool: True if the processor succeeded
+    """
+    module_name = os.path.splitext(os.path.basename(script_name))[0]
+    # SIGALRM gives a soft timeout, but only exists on POSIX and only works in the main thread
+    use_alarm = hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread()
+    previous_handler = None
+    try:
+        logger.info("Running %s in-process...", script_name)
+        if use_alarm:
+            previous_handler = signal.signal(signal.SIGALRM, _raise_processor_timeout)
+            signal.alarm(PROCESSOR_TIMEOUT)
+        # Import first: the processor's basicConfig sets the root level that its records need
+        module = importlib.import_module(module_name)
+        with _capture_processor_output(script_name):
+            returncode = module.run()
+        if returncode == 0:
+            logger.info("Successfully executed %s", script_name)
+            return True
+        logger.error("Failed to execute %s. Return code: %s", script_name, returncode)
+        return False
+    except ProcessorTimeout:
+        logger.error("Timeout executing %s", script_name)
         return False
     except Exception as e:
-        logger.error(f"Exception executing {script_name}: {str(e)}")
+        logger.error("Exception executing %s: %s", script_name, e, exc_info=True)
         return False
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous_handler)
 
 def main():
     parser = argparse.ArgumentParser(description='Download reports from RZN and RZN1 services')
     parser.add_argument('--upload-s3', action='store_true', help='Upload files to S3 after download')
-    parser.add_argument('--wait-time', type=int, default=30, help='Wait time between report generation and download (seconds)')
+    parser.add_argument('--wait-time', type=int, default=180, help='Maximum time to wait for generated reports before downloading (seconds)')
     parser.add_argument('--skip-processors', action='store_true', help='Skip executing processor scripts')
+    parser.add_argument('--force-regen', action='store_true', help='Generate reports even if a completed one from today exists')
+    parser.add_argument('--isolated-processors', action='store_true', help='Run each processor script in its own Python subprocess')
     args = parser.parse_args()
     
+    # One date for the whole run so local filenames and S3 keys agree even across midnight
+    date_prefix = get_date_prefix()
+    ensure_temp_dir()
+    
     try:
         logger.info("Starting RZN1 Service Report Processing...")
 
@@ -95,7 +232,7 @@ def main():
 
         # Step 2: Initialize API client
         logger.info("Step 2: Initializing API client for RZN1 service...")
-        api_client = DualServiceAPIClient(tokens)
+        api_client = get_client(tokens)
         
         # Step 3: Generate reports
         logger.info("Step 3: Generating reports for RZN1 service...")
@@ -125,29 +262,6 @@ def main():
                 all_processors.append(workflow_config['processor'])
         
         rzn1_reports = all_reports
-        logger.info(f"Generating RZN1 reports: {rzn1_reports}")
-        for report_type in rzn1_reports:
-            try:
-                # The API client now automatically handles the correct parameters for each report type
-                # including setting yesterday's date for 'From Date'
-                api_client.generate_report('rzn1', report_type)
-                logger.info(f"✓ Successfully requested generation of {report_type}")
-            except Exception as e:
-                logger.error(f"✗ Failed to generate {report_type} for RZN1: {str(e)}")
-                # Continue with other reports even if one fails
-                continue
-        
-        # Step 4: Wait for reports to be generated
-        logger.info(f"Step 4: Waiting {args.wait_time} seconds for reports to be generated...")
-        time.sleep(args.wait_time)
-        
-        # Step 5: Download all reports
-        logger.info("Step 5: Downloading generated reports...")
-        date_prefix = get_date_prefix()
-        downloaded_files = []
-        
-        # Download RZN1 reports
-        logger.info("Downloading RZN1 reports...")
         
         # Map our report types to actual API report names (the API uses different names than request IDs)
         report_name_mapping = {
@@ -158,19 +272,80 @@ def main():
             'closing_stock': 'Batch Level Inventory Report'  # Closing stock uses same report as batch inventory
         }
         
-        for report_type in rzn1_reports:
-            try:
+        # Reuse today's completed reports instead of regenerating them, except where two
+        # report types share one API report name and a match could belong to either
+        reports_to_generate = rzn1_reports
+        if not args.force_regen:
+            patterns = [report_name_mapping.get(report_type, report_type) for report_type in rzn1_reports]
+            reports_to_generate = []
+            for report_type, report_name_pattern in zip(rzn1_reports, patterns):
+                try:
+                    if (patterns.count(report_name_pattern) == 1 and
+                            api_client.find_completed_report_for_today('rzn1', report_name_pattern)):
+                        logger.info("✓ Reusing completed %s report from today", report_type)
+                        continue
+                except Exception as e:
+                    logger.warning("Could not check existing %s reports: %s", report_type, e)
+                reports_to_generate.append(report_type)
+        
+        # Latest completed IDs before generating, so only newly generated reports count as ready
+        baseline_ids = {}
+        if reports_to_generate:
+            baseline_ids = api_client.get_latest_completed_report_ids(
+                'rzn1', [report_name_mapping.get(report_type, report_type) for report_type in reports_to_generate]
+            )
+        
+        logger.info("Generating RZN1 reports: %s", reports_to_generate)
+        # The API client handles the correct parameters for each report type, including
+        # yesterday's 'From Date', and requests them concurrently over its session pool;
+        # a failed report is logged and the others continue
+        generation_results = api_client.generate_reports_batch('rzn1', reports_to_generate)
+        for report_type in reports_to_generate:
+            if generation_results.get(report_type):
+                logger.info("✓ Successfully requested generation of %s", report_type)
+            else:
+                logger.error("✗ Failed to generate %s for RZN1", report_type)
+        
+        # Step 4: Wait for reports to be generated
+        generated_patterns = [
+            report_name_mapping.get(report_type, report_type)
+            for report_type in reports_to_generate if generation_results.get(report_type)
+        ]
+        if generated_patterns:
+            logger.info("Step 4: Waiting up to %s seconds for reports to be generated...", args.wait_time)
+            if not api_client.wait_for_reports_ready('rzn1', generated_patterns, baseline_ids, max_wait=args.wait_time):
+                logger.warning("Some reports were not ready in time; downloading the latest completed versions")
+        else:
+            logger.info("Step 4: No reports being generated, skipping wait")
+        
+        # Step 5: Download all reports
+        logger.info("Step 5: Downloading generated reports...")
+        downloaded_files = []
+        
+        # Download RZN1 reports
+        logger.info("Downloading RZN1 reports...")
+        
+        # Download concurrently; results are collected in report order
+        with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(rzn1_reports))) as executor:
+            futures = {}
+            for report_type in rzn1_reports:
                 filename = generate_filename('rzn1', report_type, date_prefix)
                 # Use the mapped report name for precise matching
                 report_name_pattern = report_name_mapping.get(report_type, report_type)
-                local_path = api_client.download_latest_completed_report('rzn1', report_name_pattern, filename)
-                if local_path:
-                    downloaded_files.append(local_path)
-                    logger.info(f"✓ Downloaded: {filename}")
-                else:
-                    logger.warning(f"✗ Failed to download: {report_type} for RZN1")
-            except Exception as e:
-                logger.error(f"✗ Error downloading {report_type} for RZN1: {str(e)}")
+                futures[report_type] = executor.submit(
+                    api_client.download_latest_completed_report, 'rzn1', report_name_pattern, filename
+                )
+            
+            for report_type, future in futures.items():
+                try:
+                    local_path = future.result()
+                    if local_path:
+                        downloaded_files.append(local_path)
+                        logger.info("✓ Downloaded: %s", os.path.basename(local_path))
+                    else:
+                        logger.warning("✗ Failed to download: %s for RZN1", report_type)
+                except Exception as e:
+                    logger.error("✗ Error downloading %s for RZN1: %s", report_type, e)
         
         # Download RZN reports
         # print(f"\nDownloading RZN reports...")
@@ -189,51 +364,45 @@ def main():
         # Step 6: Upload to S3 (optional)
         uploaded_files = []
         if args.upload_s3 and downloaded_files:
-            logger.info(f"Step 6: Uploading {len(downloaded_files)} files to S3...")
+            logger.info("Step 6: Uploading %s files to S3...", len(downloaded_files))
             s3_uploader = S3Uploader()
-            date_prefix = get_date_prefix()
             
-            for file_path in downloaded_files:
-                try:
-                    filename = os.path.basename(file_path)
-                    # Use date-specific subfolders as expected by processors
-                    # Route all files to inventory_summary folder for now
-                    if 'OPEN_ORDER_SUMMARY' in filename:
-                        s3_key = f"rzn1/inventory_summary/raw/{date_prefix}/{filename}"
-                    elif 'BATCH_LEVEL_INVENTORY' in filename:
-                        s3_key = f"rzn1/inventory_summary/raw/{date_prefix}/{filename}"
-                    elif 'CLOSING_STOCK' in filename:
-                        s3_key = f"rzn1/inventory_summary/raw/{date_prefix}/{filename}"
-                    elif 'ORDER_SUMMARY' in filename or 'SALES_RETURN' in filename:
-                        s3_key = f"rzn1/order_summary/raw/{date_prefix}/{filename}"
-                    else:
-                        s3_key = f"rzn1/raw/{filename}"
-                    
-                    if s3_uploader.upload_file(file_path, s3_key):
-                        logger.info(f"✓ Uploaded to S3: {s3_key}")
-                        uploaded_files.append(file_path)
-                    else:
-                        logger.error(f"✗ Failed to upload to S3: {filename}")
-                except Exception as e:
-                    logger.error(f"✗ Error uploading {filename} to S3: {str(e)}")
+            # Work out every destination key first, then upload them concurrently
+            uploads = [
+                (file_path, get_s3_key(os.path.basename(file_path), date_prefix))
+                for file_path in downloaded_files
+            ]
+            
+            upload_results = s3_uploader.upload_files(uploads)
+            for file_path, s3_key in uploads:
+                if upload_results.get(file_path):
+                    logger.info("✓ Uploaded to S3: %s", s3_key)
+                    uploaded_files.append(file_path)
+                else:
+                    logger.error("✗ Failed to upload to S3: %s", os.path.basename(file_path))
             
             # Step 7: Clean up temporary files after successful S3 upload
             if uploaded_files:
-                logger.info(f"Step 7: Cleaning up {len(uploaded_files)} temporary files...")
+                logger.info("Step 7: Cleaning up %s temporary files...", len(uploaded_files))
                 cleanup_temp_files(uploaded_files)
         
         # Step 8: Execute processor scripts (if not skipped)
         if not args.skip_processors and uploaded_files:
             logger.info("Step 8: Executing processor scripts...")
             processor_scripts = all_processors  # Use all processors from workflow config
+            # Built once; carries the loaded .env values and the WMS_ENV_LOADED sentinel
+            processor_env = os.environ.copy() if args.isolated_processors else None
             
             for script in processor_scripts:
                 if os.path.exists(script):
-                    success = execute_processor_script(script)
+                    if args.isolated_processors:
+                        success = execute_processor_script(script, processor_env)
+                    else:
+                        success = run_processor_in_process(script)
                     if not success:
-                        logger.warning(f"Processor script {script} failed, but continuing...")
+                        logger.warning("Processor script %s failed, but continuing...", script)
                 else:
-                    logger.warning(f"Processor script {script} not found, skipping...")
+                    logger.warning("Processor script %s not found, skipping...", script)
         
         # Step 9: Verify S3 outputs (if processors were executed)
         if not args.skip_processors and uploaded_files:
@@ -248,26 +417,26 @@ def main():
             except ImportError:
                 logger.warning("Verification script not available, skipping S3 verification")
             except Exception as e:
-                logger.warning(f"S3 verification failed: {str(e)}")
+                logger.warning("S3 verification failed: %s", e)
         
         # Step 10: Summary
         logger.info("=" * 60)
         logger.info("PROCESS SUMMARY")
         logger.info("=" * 60)
-        logger.info(f"Total files downloaded: {len(downloaded_files)}")
-        logger.info(f"Total files uploaded to S3: {len(uploaded_files)}")
-        logger.info(f"Files saved in: {TEMP_DOWNLOAD_DIR}")
+        logger.info("Total files downloaded: %s", len(downloaded_files))
+        logger.info("Total files uploaded to S3: %s", len(uploaded_files))
+        logger.info("Files saved in: %s", TEMP_DOWNLOAD_DIR)
         
         if downloaded_files:
             logger.info("Downloaded files:")
             for file_path in downloaded_files:
-                logger.info(f"  - {os.path.basename(file_path)}")
+                logger.info("  - %s", os.path.basename(file_path))
         
         logger.info("Process completed successfully!")
         return 0
         
     except Exception as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: %s", e)
         return 1
 
 if __name__ == "__main__":
@@ -0,0 +1,341 @@
+import pandas as pd
+import numpy as np
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+from io import BytesIO
+import logging
+from typing import Dict, Tuple
+import re
+from concurrent.futures import ThreadPoolExecutor
+from config import S3_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Independent S3 GETs/PUTs in the pipeline run concurrently on this many threads
+S3_WORKERS = 4
+
+# Outputs above this size are uploaded in parts of the same size
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Parts of a single multipart upload sent in parallel
+MULTIPART_CONCURRENCY = 8
+
+# Enough pooled connections for every concurrent upload's parts (S3_WORKERS x MULTIPART_CONCURRENCY)
+S3_MAX_POOL_CONNECTIONS = S3_WORKERS * MULTIPART_CONCURRENCY
+
+# Columns the batch level inventory cleaner needs; everything else is skipped at parse time
+BATCH_LEVEL_INVENTORY_COLUMNS = ['Warehouse', 'SKU Code', 'Product Description', 'SKU Category', 'SKU Sub Category', 'Zone', 'Available Quantity', 'Price']
+
+# Text columns are read as-is; quantities stay inferred so pd.to_numeric can coerce bad values
+BATCH_LEVEL_INVENTORY_DTYPES = {
+    'Warehouse': 'category', 'SKU Code': str, 'Product Description': str,
+    'SKU Category': 'category', 'SKU Sub Category': 'category', 'Zone': 'category'
+}
+
+# Warehouses reported as the Haryana region
+HR_WAREHOUSES = ('HR007_RJV_LS1', 'HR009_PLA_LS1')
+
+# "loose" is stripped from SKU codes regardless of case
+LOOSE_SKU_RE = re.compile(r'loose', re.IGNORECASE)
+
+
+def map_unique(series: pd.Series, func) -> pd.Series:
+    """
+    Apply a string transformation once per distinct value and map the results back.
+
+    Args:
+        series: Column to transform
+        func: Function applied to each distinct string value; non-strings pass through
+
+    Returns:
+        pd.Series: Transformed column aligned with the input
+    """
+    uniques = series.unique()
+    return series.map(dict(zip(uniques, (func(v) if isinstance(v, str) else v for v in uniques))))
+
+
+def startswith_mask(series: pd.Series, prefixes: tuple) -> np.ndarray:
+    """
+    Case-insensitive prefix test evaluated once per distinct value.
+
+    Args:
+        series: Text column to test
+        prefixes: Upper-case prefixes to look for
+
+    Returns:
+        np.ndarray: Boolean mask aligned with series; missing values are False
+    """
+    codes, uniques = pd.factorize(series)
+    # One extra False slot so the -1 code of missing values indexes to False
+    hits = np.zeros(len(uniques) + 1, dtype=bool)
+    hits[:-1] = [isinstance(v, str) and v.upper().startswith(prefixes) for v in uniques]
+    return hits[codes]
+
+
+class InventoryProcessorBase:
+    """
+    Shared S3 I/O and batch level inventory cleaning for the RZN1 inventory processors.
+
+    Subclasses set:
+    - excluded_zone_keywords: optional zone substrings whose rows are dropped
+    - warehouse_pattern: optional regex a Warehouse must match to be kept
+    and implement their own process_complete_pipeline.
+    """
+
+    excluded_zone_keywords = []
+    warehouse_pattern = None
+
+    def __init__(self, aws_access_key_id: str = None, aws_secret_access_key: str = None, region_name: str = 'ap-south-1', bucket_name: str = None):
+        self.bucket_name = bucket_name
+        self.region_name = region_name
+
+        # Initialize S3 client
+        if aws_access_key_id and aws_secret_access_key:
+            self.s3_client = boto3.client(
+                's3',
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                region_name=region_name,
+                config=BotoConfig(
+                    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                    retries=S3_RETRIES,
+                    tcp_keepalive=True
+                )
+            )
+        else:
+            raise ValueError("AWS credentials are required")
+
+        # Multipart settings for processed CSV uploads
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+            max_concurrency=MULTIPART_CONCURRENCY
+        )
+
+        # Immutable set: isin looks it up directly against the SKU Category categories
+        self.excluded_categories = frozenset({
+            "Accessories", "Apparel", "Asset", "Capex",
+            "Clothing And Accessories", "Consumables", "Footwears", "Rajeev Colony_CxEC Lite"
+        })
+
+        # Compiled once; the keywords are literal, case-insensitive substrings.
+        # No keywords means no zone filter (an empty pattern would match every zone)
+        self.excluded_zone_re = (
+            re.compile('|'.join(re.escape(z) for z in self.excluded_zone_keywords), re.IGNORECASE)
+            if self.excluded_zone_keywords else None
+        )
+
+    def find_file_with_prefix(self, file_prefix: str, search_prefix: str) -> str:
+        """
+        Find a file in S3 that starts with the given prefix within a folder.
+
+        Args:
+            file_prefix: File name prefix to search for (e.g., CLOSING_STOCK_REPORT20250829)
+            search_prefix: S3 prefix/folder to search within
+
+        Returns:
+            str: Full S3 key of the found file
+        """
+        try:
+            search_path = f"{search_prefix.rstrip('/')}/{file_prefix}" if search_prefix else file_prefix
+            logger.info(f"Searching for files starting with: {file_prefix} in prefix: {search_prefix}")
+
+            # Only the first (lexicographically smallest) match is used, so list just one key
+            response = self.s3_client.list_objects_v2(
+                Bucket=self.bucket_name,
+                Prefix=search_path,
+                MaxKeys=1
+            )
+
+            if 'Contents' not in response or not response['Contents']:
+                raise FileNotFoundError(f"No files found starting with: {search_path}")
+
+            # Get the first matching file
+            found_file = response['Contents'][0]['Key']
+            logger.info(f"Found file: {found_file}")
+
+            return found_file
+
+        except Exception as e:
+            logger.error(f"File Not Found in the source. Try again \n ref: {file_prefix} in {search_prefix} is not found: {str(e)}")
+            raise
+
+    def fetch_csv_from_s3(self, file_key: str, usecols: list = None, dtype: dict = None) -> pd.DataFrame:
+        """
+        Fetch a CSV file from S3 and return as pandas DataFrame.
+
+        Args:
+            file_key: S3 key of the CSV file
+            usecols: Columns to parse; any other column is skipped by the parser
+            dtype: Column dtypes to use instead of inferring them
+
+        Returns:
+            pd.DataFrame: Parsed CSV contents
+        """
+        try:
+            logger.info(f"Fetching file from S3: s3://{self.bucket_name}/{file_key}")
+
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key)
+
+            # Stream the body into the parser so the raw CSV is never held in memory whole.
+            # Columns are selected by membership so a missing one still reaches the cleaner's check.
+            wanted = set(usecols) if usecols else None
+            with response['Body'] as body:
+                df = pd.read_csv(body, usecols=(lambda col: col in wanted) if wanted else None, dtype=dtype)
+            logger.info(f"Successfully loaded CSV with shape: {df.shape}")
+
+            return df
+
+        except Exception as e:
+            logger.error(f"Error fetching CSV from S3: {str(e)}")
+            raise
+
+    def find_and_fetch_csv(self, file_prefix: str, search_prefix: str, usecols: list = None, dtype: dict = None) -> pd.DataFrame:
+        """
+        Find the file starting with the given prefix and fetch it as a DataFrame.
+
+        Args:
+            file_prefix: Prefix the file name starts with
+            search_prefix: S3 folder to search in
+            usecols: Columns to parse
+            dtype: Column dtypes to use instead of inferring them
+
+        Returns:
+            pd.DataFrame: Contents of the matching CSV
+        """
+        file_key = self.find_file_with_prefix(file_prefix, search_prefix)
+        return self.fetch_csv_from_s3(file_key, usecols=usecols, dtype=dtype)
+
+    def upload_csv_to_s3(self, df: pd.DataFrame, filename: str, output_prefix: str) -> bool:
+        """
+        Upload a pandas DataFrame as CSV to S3 with specified prefix.
+
+        Args:
+            df: pandas DataFrame to upload
+            filename: Name of the file to upload
+            output_prefix: S3 prefix/folder where to save the CSV
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            # Encode the CSV straight into a bytes buffer (no intermediate str copy)
+            csv_buffer = BytesIO()
+            df.to_csv(csv_buffer, index=False, encoding='utf-8')
+
+            # Create the full S3 key
+            s3_key = f"{output_prefix.rstrip('/')}/{filename}" if output_prefix else filename
+
+            # Upload to S3; large outputs go up as parallel multipart chunks
+            csv_buffer.seek(0)
+            self.s3_client.upload_fileobj(
+                csv_buffer,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={'ContentType': 'text/csv'},
+                Config=self.transfer_config
+            )
+
+            logger.info(f"Successfully uploaded {filename} to s3://{self.bucket_name}/{s3_key}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error uploading {filename} to S3: {str(e)}")
+            return False
+
+    def upload_datasets(self, datasets: Dict[str, pd.DataFrame], output_filenames: dict, output_prefix: str) -> dict:
+        """
+        Upload every processed dataset concurrently.
+
+        Args:
+            datasets: DataFrames keyed by file type
+            output_filenames: Output file name for each file type
+            output_prefix: S3 prefix/folder where to save the CSVs
+
+        Returns:
+            dict: Upload success flag keyed by file name
+        """
+        upload_results = {}
+        with ThreadPoolExecutor(max_workers=S3_WORKERS) as executor:
+            futures = {}
+            for file_type, df in datasets.items():
+                filename = output_filenames[file_type]
+                futures[filename] = (executor.submit(self.upload_csv_to_s3, df, filename, output_prefix), len(df))
+            for filename, (future, row_count) in futures.items():
+                upload_results[filename] = future.result()
+                logger.info(f"Uploaded {filename}: {row_count} rows")
+        return upload_results
+
+    def clean_batch_level_inventory_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Clean and filter batch level inventory data.
+        """
+        try:
+            logger.info(f"Starting data cleaning. Initial shape: {df.shape}")
+
+            # Defensive: Check required columns
+            required_cols = BATCH_LEVEL_INVENTORY_COLUMNS
+            missing_cols = [col for col in required_cols if col not in df.columns]
+            if missing_cols:
+                raise ValueError(f"[❌] Missing required columns: {missing_cols}")
+
+            # Low-cardinality text as category: .str ops and isin then run once per distinct value
+            df = df.astype({'SKU Category': 'category', 'SKU Sub Category': 'category'})
+
+            # Standardize text
+            df['Warehouse'] = df['Warehouse'].astype('category').str.strip().str.lower().astype('category')
+            df = df.rename(columns={"Product Description": "SKU Description"})
+            df['SKU Code'] = map_unique(df['SKU Code'], lambda v: LOOSE_SKU_RE.sub('', v))
+            df['SKU Description'] = map_unique(df['SKU Description'], str.strip)
+            df['Zone'] = df['Zone'].astype('category').str.strip().astype('category')
+
+            # Build every row filter on the same frame and slice once
+            masks = {}
+            # Filter valid warehouses
+            if self.warehouse_pattern:
+                masks['Warehouse'] = df['Warehouse'].str.contains(self.warehouse_pattern, case=False, na=False)
+            # Remove FR and CAP SKUs
+            masks['FR/CAP SKUs'] = ~startswith_mask(df['SKU Code'], ('FR', 'CAP'))
+            # Remove excluded categories
+            masks['SKU Category'] = ~df['SKU Category'].isin(self.excluded_categories)
+            # Remove bad zones
+            if self.excluded_zone_re is not None:
+                masks['zone'] = ~df['Zone'].str.contains(self.excluded_zone_re, na=False)
+            logger.info("Rows dropped - " + ", ".join(f"{name}: {(~mask).sum()}" for name, mask in masks.items()))
+
+            keep = np.logical_and.reduce(list(masks.values()))
+            df = df.loc[keep].copy()
+            logger.info(f"After {', '.join(masks)} filters: {df.shape}")
+
+            # Convert to numerics
+            df['Available Quantity'] = pd.to_numeric(df['Available Quantity'], errors='coerce').fillna(0)
+            df['Price'] = pd.to_numeric(df['Price'], errors='coerce').fillna(0)
+            # Restore uppercase warehouse (renames the categories, not every row)
+            df['Warehouse'] = df['Warehouse'].cat.rename_categories(str.upper)
+
+            logger.info(f"Data cleaning completed. Final shape: {df.shape}")
+            return df
+        except Exception as e:
+            logger.error(f"Error in data cleaning: {str(e)}")
+            raise
+
+    def split_by_regions(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Split data by UP and HR regions.
+        """
+        # Decide region membership per warehouse category, then select rows by integer code
+        warehouse = df['Warehouse'].astype('category')
+        categories = warehouse.cat.categories
+        up_codes = [i for i, name in enumerate(categories) if isinstance(name, str) and name.startswith('UP')]
+        hr_codes = [i for i, name in enumerate(categories) if name in HR_WAREHOUSES]
+        warehouse_codes = warehouse.cat.codes.to_numpy()
+
+        # Boolean selection already returns new frames and callers only serialize them, so no .copy()
+        df_up = df[np.isin(warehouse_codes, up_codes)]
+        df_hr = df[np.isin(warehouse_codes, hr_codes)]
+
+        logger.info(f"UP Region shape: {df_up.shape}")
+        logger.info(f"Haryana Region shape: {df_hr.shape}")
+
+        return df_up, df_hr
@@ -1,12 +1,17 @@
 import pandas as pd
+import numpy as np
 import boto3
+from botocore.config import Config as BotoConfig
 from datetime import datetime, date
-from io import StringIO, BytesIO
+from io import BytesIO
 import logging
 from typing import Dict, Tuple, Optional
 import os
-from dotenv import load_dotenv
+from config import load_env, S3_RETRIES
 import calendar
+import gzip
+import re
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging with timestamp
 logging.basicConfig(
@@ -16,6 +21,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Output CSVs (complete, UP, HR) uploaded concurrently
+UPLOAD_WORKERS = 3
+
+# Room for every concurrent upload's multipart parts (boto3 sends up to 10 per upload)
+S3_MAX_POOL_CONNECTIONS = UPLOAD_WORKERS * 10
+
+# Fastest gzip level: most of the size win for a fraction of the CPU
+GZIP_COMPRESS_LEVEL = 1
+
+
+def format_iso_dates(series: pd.Series) -> pd.Series:
+    """
+    Format dates as YYYY-MM-DD strings, matching dt.strftime('%Y-%m-%d').
+    
+    Args:
+        series: Dates or date-like values
+        
+    Returns:
+        pd.Series: Date strings, NaN where the date is missing
+    """
+    dates = pd.to_datetime(series)
+    if dates.dt.tz is not None:
+        return dates.dt.strftime('%Y-%m-%d')
+    # numpy formats day-resolution datetimes in C instead of per-element strftime
+    days = dates.to_numpy().astype('datetime64[D]')
+    text = np.datetime_as_string(days, unit='D').astype(object)
+    text[np.isnat(days)] = np.nan
+    return pd.Series(text, index=series.index)
+
 
 class OrderSummaryProcessor:
     """
@@ -39,7 +73,12 @@ class OrderSummaryProcessor:
                 's3',
                 aws_access_key_id=aws_access_key_id,
                 aws_secret_access_key=aws_secret_access_key,
-                region_name=region_name
+                region_name=region_name,
+                config=BotoConfig(
+                    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                    retries=S3_RETRIES,
+                    tcp_keepalive=True
+                )
             )
         else:
             raise ValueError("AWS credentials are required")
@@ -48,6 +87,16 @@ class OrderSummaryProcessor:
             "Accessories", "Apparel", "Asset", "Capex", "Clothing And Accessories", "Consumables", "Footwears", "Rajeev Colony_CxEC Lite"
         ]
         
+        # Patterns compiled once and reused by every cleaning pass
+        self.warehouse_re = re.compile(r'hm1|ls1')
+        self.loose_re = re.compile(r'loose', re.IGNORECASE)
+        
+        # Key listings per S3 prefix, filled on first lookup
+        self._prefix_listings = {}
+        
+        # Opt-in gzip of output CSVs (uploaded as <name>.csv.gz)
+        self.gzip_output = os.getenv('ORDER_OUTPUT_GZIP', 'false').lower() == 'true'
+        
         # Direct column mapping between order summary and sales returns
         self.column_map = {
             'SKU Code': 'Sku Code',
@@ -68,16 +117,15 @@ class OrderSummaryProcessor:
             search_path = f"{search_prefix.rstrip('/')}/{file_prefix}" if search_prefix else file_prefix
             logger.info(f"Searching for files starting with: {file_prefix} in prefix: {search_prefix}")
             
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=search_path
-            )
+            # Both input files live in the same folder, so list it once and match in memory
+            list_prefix = f"{search_prefix.rstrip('/')}/" if search_prefix else file_prefix
+            matches = [key for key in self._list_prefix(list_prefix) if key.startswith(search_path)]
             
-            if 'Contents' not in response or not response['Contents']:
+            if not matches:
                 raise FileNotFoundError(f"No files found starting with: {search_path}")
             
             # Get the first matching file
-            found_file = response['Contents'][0]['Key']
+            found_file = matches[0]
             logger.info(f"Found file: {found_file}")
             
             return found_file
@@ -86,6 +134,25 @@ class OrderSummaryProcessor:
             logger.error(f"Error searching for files with prefix {file_prefix} in {search_prefix}: {str(e)}")
             raise
     
+    def _list_prefix(self, prefix: str) -> Tuple[str, ...]:
+        """
+        List every key under a prefix, paging past 1000 keys, cached per processor.
+        
+        Args:
+            prefix: S3 prefix to list
+            
+        Returns:
+            tuple: Keys under the prefix in lexicographic order
+        """
+        if prefix not in self._prefix_listings:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            self._prefix_listings[prefix] = tuple(
+                obj['Key']
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix)
+                for obj in page.get('Contents', [])
+            )
+        return self._prefix_listings[prefix]
+    
     def fetch_csv_from_s3(self, file_key: str) -> pd.DataFrame:
         """
         Fetch a CSV file from S3 and return as pandas DataFrame.
@@ -94,9 +161,10 @@ class OrderSummaryProcessor:
             logger.info(f"Fetching file from S3: s3://{self.bucket_name}/{file_key}")
             
             response = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key)
-            csv_content = response['Body'].read().decode('utf-8')
             
-            df = pd.read_csv(StringIO(csv_content))
+            # Stream the body into the parser so the raw CSV is never held in memory whole
+            with response['Body'] as body:
+                df = pd.read_csv(body, encoding='utf-8')
             logger.info(f"Successfully loaded CSV with shape: {df.shape}")
             
             return df
@@ -119,19 +187,27 @@ class OrderSummaryProcessor:
         """
         try:
             file_key = f"{output_prefix.rstrip('/')}/{filename}" if output_prefix else filename
+            extra_args = {'ContentType': 'text/csv'}
+            if self.gzip_output:
+                file_key += '.gz'
+                extra_args['ContentEncoding'] = 'gzip'
             logger.info(f"Uploading CSV to S3: s3://{self.bucket_name}/{file_key}")
             
-            # Convert DataFrame to CSV string
-            csv_buffer = StringIO()
-            df.to_csv(csv_buffer, index=False)
-            csv_content = csv_buffer.getvalue()
-            
-            # Upload to S3
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=file_key,
-                Body=csv_content.encode('utf-8'),
-                ContentType='text/csv'
+            # Encode the CSV straight into a bytes buffer (no intermediate str copy)
+            csv_buffer = BytesIO()
+            if self.gzip_output:
+                with gzip.GzipFile(fileobj=csv_buffer, mode='wb', compresslevel=GZIP_COMPRESS_LEVEL) as gz:
+                    df.to_csv(gz, index=False, encoding='utf-8')
+            else:
+                df.to_csv(csv_buffer, index=False, encoding='utf-8')
+            
+            # Upload to S3 from the buffer; large outputs go up as multipart chunks
+            csv_buffer.seek(0)
+            self.s3_client.upload_fileobj(
+                csv_buffer,
+                self.bucket_name,
+                file_key,
+                ExtraArgs=extra_args
             )
             
             logger.info(f"Successfully uploaded CSV with {len(df)} rows to {file_key}")
@@ -147,38 +223,61 @@ class OrderSummaryProcessor:
         """
         logger.info(f"Starting order summary cleaning. Initial shape: {df_os.shape}")
         
-        # Standardize warehouse names
+        # Standardize warehouse names and clean SKU Code (remove 'loose')
         df_os['Warehouse'] = df_os['Warehouse'].str.strip().str.lower()
+        df_os['SKU Code'] = df_os['SKU Code'].str.replace(self.loose_re, '', regex=True)
+        # As a category, isin checks each distinct SKU Category once
+        df_os['SKU Category'] = df_os['SKU Category'].astype('category')
+        
+        # Build every row filter on the same frame and slice once
+        masks = {
+            # Filter warehouses (keep only hm1 and ls1)
+            'warehouse': df_os['Warehouse'].str.contains(self.warehouse_re, na=False),
+            # Remove unwanted SKU codes (FR and CAP prefixes) with a single upper-case pass
+            'FR/CAP SKUs': ~df_os['SKU Code'].str.upper().str.startswith(('FR', 'CAP'), na=False),
+            # Remove excluded categories
+            'SKU category': ~df_os['SKU Category'].isin(self.excluded_categories),
+            # Remove orders with 'st' in Order Reference (plain case-insensitive substring, no regex)
+            'order reference': ~df_os['Order Reference'].str.contains('st', case=False, regex=False, na=False),
+            # Remove cancelled orders
+            'order status': ~df_os['OrderStatus'].str.lower().eq('cancelled'),
+        }
+        logger.info("Rows dropped - " + ", ".join(f"{name}: {(~mask).sum()}" for name, mask in masks.items()))
         
-        # Filter warehouses (keep only hm1 and ls1)
-        df_os = df_os[df_os['Warehouse'].str.contains(r'hm1|ls1', na=False)].copy()
-        logger.info(f"After warehouse filter: {df_os.shape}")
-        
-        # Clean SKU Code (remove 'loose')
-        df_os['SKU Code'] = df_os['SKU Code'].str.replace(r'(?i)loose', '', regex=True)
-        
-        # Remove unwanted SKU codes (FR and CAP prefixes)
-        df_os = df_os[~df_os['SKU Code'].str.upper().str.startswith('FR', na=False)]
-        df_os = df_os[~df_os['SKU Code'].str.upper().str.startswith('CAP', na=False)]
-        logger.info(f"After removing FR CAP SKUs and replacing loose: {df_os.shape}")
-        
-        # Remove excluded categories
-        df_os = df_os[~df_os['SKU Category'].isin(self.excluded_categories)]
-        logger.info(f"After SKU category filter: {df_os.shape}")
-        
-        # Remove orders with 'st' in Order Reference
-        df_os = df_os[~df_os['Order Reference'].str.lower().str.contains('st', na=False)]
-        logger.info(f"After order reference filter: {df_os.shape}")
-        
-        # Remove cancelled orders
-        df_os = df_os[~df_os['OrderStatus'].str.lower().eq('cancelled')]
-        logger.info(f"After order status filter: {df_os.shape}")
+        df_os = df_os.loc[np.logical_and.reduce(list(masks.values()))].copy()
+        logger.info(f"After warehouse, SKU, category, order reference and status filters: {df_os.shape}")
         
         # Initialize return columns
         df_os['Return Qty'] = 0
         df_os['Return Value'] = 0
         return df_os
     
+    def _sum_returns_by_key(self, df_sr: pd.DataFrame) -> pd.DataFrame:
+        """
+        Sum return Quantity and TotalCreditNoteAmount per Merge key.
+        
+        Equivalent to groupby('Merge').sum() on the two columns (missing values count as 0),
+        done as one sort plus np.add.reduceat over contiguous arrays.
+        
+        Args:
+            df_sr: Sales returns with Merge, Quantity and TotalCreditNoteAmount columns
+            
+        Returns:
+            pd.DataFrame: One row per Merge key, sorted by key
+        """
+        if df_sr.empty:
+            return pd.DataFrame({'Merge': [], 'Quantity': [], 'TotalCreditNoteAmount': []})
+        
+        keys = df_sr['Merge'].to_numpy()
+        order = np.argsort(keys, kind='stable')
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        
+        sums = {'Merge': unique_keys}
+        for col in ['Quantity', 'TotalCreditNoteAmount']:
+            values = pd.to_numeric(df_sr[col], errors='coerce').fillna(0).to_numpy()
+            sums[col] = np.add.reduceat(values[order], starts)
+        return pd.DataFrame(sums)
+    
     def process_sales_returns(self, df_os: pd.DataFrame, df_sr: pd.DataFrame) -> pd.DataFrame:
         """
         Process sales returns and merge with order summary data.
@@ -186,55 +285,60 @@ class OrderSummaryProcessor:
         logger.info(f"Processing sales returns. Sales return shape: {df_sr.shape}")
         
         # Clean SKU Code in sales returns (ensure consistent formatting)
-        df_sr['Sku Code'] = df_sr['Sku Code'].astype(str).str.strip().str.replace(r'(?i)loose', '', regex=True)
+        df_sr['Sku Code'] = df_sr['Sku Code'].astype(str).str.strip().str.replace(self.loose_re, '', regex=True)
         
         # Clean Invoice/Challan Number (remove any whitespace/formatting issues)
         df_sr['Invoice / Challan Number'] = df_sr['Invoice / Challan Number'].astype(str).str.strip()
         
         # Create merge key for sales returns
-        df_sr['Merge'] = df_sr['Invoice / Challan Number'] + df_sr['Sku Code']
+        # Plain list comprehension over the str arrays is cheaper than Series '+' per element
+        df_sr['Merge'] = [invoice + sku for invoice, sku in zip(df_sr['Invoice / Challan Number'].to_numpy(), df_sr['Sku Code'].to_numpy())]
+        
+        # Clean order summary data for merge
+        df_os['Invoice Number'] = df_os['Invoice Number'].astype(str).str.strip()
+        df_os['SKU Code'] = df_os['SKU Code'].astype(str).str.strip()
+        
+        # Create merge key for order summary
+        df_os['Merge_temp'] = [invoice + sku for invoice, sku in zip(df_os['Invoice Number'].to_numpy(), df_os['SKU Code'].to_numpy())]
+        # Factorized once: the unique keys drive the pushdown filter, the codes drive the join
+        os_codes, os_uniques = pd.factorize(df_os['Merge_temp'])
+        os_merge_keys = pd.Index(os_uniques)
         
         # Debug: Check for duplicates in sales returns before aggregation
         logger.info(f"Sales returns before aggregation: {len(df_sr)} rows")
         logger.info(f"Unique merge keys in sales returns: {df_sr['Merge'].nunique()}")
         
+        # Only returns whose key appears in the cleaned order summary can survive the left merge,
+        # so drop the rest before aggregating and joining
+        df_sr = df_sr[df_sr['Merge'].isin(os_merge_keys)]
+        logger.info(f"Sales returns matching order summary: {len(df_sr)} rows")
+        
         # Aggregate sales returns by merge key - ensure we're not double-counting
-        sr_lookup_agg = df_sr.groupby('Merge', as_index=False).agg({
-            'Quantity': 'sum',
-            'TotalCreditNoteAmount': 'sum'
-        })
+        sr_lookup_agg = self._sum_returns_by_key(df_sr)
         
         logger.info(f"Sales returns after aggregation: {len(sr_lookup_agg)} rows")
         
-        # Clean order summary data for merge
-        df_os['Invoice Number'] = df_os['Invoice Number'].astype(str).str.strip()
-        df_os['SKU Code'] = df_os['SKU Code'].astype(str).str.strip()
-        
-        # Create merge key for order summary
-        df_os['Merge_temp'] = df_os['Invoice Number'] + df_os['SKU Code']
-        
-        # Debug: Check merge key matches
-        os_merge_keys = set(df_os['Merge_temp'].unique())
-        sr_merge_keys = set(sr_lookup_agg['Merge'].unique())
-        matching_keys = os_merge_keys.intersection(sr_merge_keys)
+        # Debug: Check merge key matches (every aggregated key now matches)
         logger.info(f"Order summary unique merge keys: {len(os_merge_keys)}")
-        logger.info(f"Sales returns unique merge keys: {len(sr_merge_keys)}")
-        logger.info(f"Matching merge keys: {len(matching_keys)}")
+        logger.info(f"Matching merge keys: {len(sr_lookup_agg)}")
         
-        # Merge with sales returns
-        df_os = df_os.merge(sr_lookup_agg, left_on='Merge_temp', right_on='Merge', how='left')
-        logger.info(f"After return column merge: {df_os.shape}")
+        # Join on integer codes: look up each aggregated return's code once instead of
+        # hash-joining the long string keys row by row
+        sr_codes = os_merge_keys.get_indexer(sr_lookup_agg['Merge'])
         
-        # Update return columns with proper null handling
-        df_os['Return Qty'] = pd.to_numeric(df_os['Quantity'], errors='coerce').fillna(0)
-        df_os['Return Value'] = pd.to_numeric(df_os['TotalCreditNoteAmount'], errors='coerce').fillna(0)
+        # Update return columns with proper null handling (keys without returns get 0)
+        for source_col, return_col in [('Quantity', 'Return Qty'), ('TotalCreditNoteAmount', 'Return Value')]:
+            totals = np.zeros(len(os_uniques))
+            totals[sr_codes] = pd.to_numeric(sr_lookup_agg[source_col], errors='coerce').fillna(0).to_numpy()
+            df_os[return_col] = totals[os_codes]
+        logger.info(f"After return column merge: {df_os.shape}")
         
         # Debug: Check return values
         total_return_value = df_os['Return Value'].sum()
         logger.info(f"Total return value after merge: {total_return_value}")
         
         # Clean up temporary columns
-        df_os = df_os.drop(columns=['Merge_temp', 'Merge', 'Quantity', 'TotalCreditNoteAmount'])
+        df_os = df_os.drop(columns=['Merge_temp'])
         return df_os
     
     def calculate_net_sales(self, df_os: pd.DataFrame) -> pd.DataFrame:
@@ -248,23 +352,33 @@ class OrderSummaryProcessor:
             df_os[col] = pd.to_numeric(df_os[col], errors='coerce').fillna(0)
         
         # Calculate net sales - using correct column names
-        df_os['Sales Qty'] = df_os['Invoice quantity'] - df_os['Return Qty']
-        df_os['Sales Value'] = df_os['InvoiceAmount'] - df_os['Return Value']
+        # Subtract the raw arrays; both sides share the frame's index so no alignment is needed
+        df_os['Sales Qty'] = np.subtract(df_os['Invoice quantity'].to_numpy(), df_os['Return Qty'].to_numpy())
+        df_os['Sales Value'] = np.subtract(df_os['InvoiceAmount'].to_numpy(), df_os['Return Value'].to_numpy())
         
-        # Restore uppercase warehouse names
-        df_os['Warehouse'] = df_os['Warehouse'].str.upper()
+        # Restore uppercase warehouse names; as a category the region split compares integer codes
+        df_os['Warehouse'] = df_os['Warehouse'].str.upper().astype('category')
 
         # Normalize order date
-        df_os['Order Date'] = pd.to_datetime(df_os['Order Date'], errors='coerce')
-        df_os['Order Date'] = df_os['Order Date'].dt.normalize()
+        order_date = pd.to_datetime(df_os['Order Date'], errors='coerce')
+        if order_date.dt.tz is None:
+            # Flooring to datetime64[D] is a plain integer truncation in numpy
+            df_os['Order Date'] = order_date.to_numpy().astype('datetime64[D]').astype('datetime64[ns]')
+        else:
+            df_os['Order Date'] = order_date.dt.normalize()
         return df_os
     
     def split_by_regions(self, df_os: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Split data by UP and HR regions.
         """
-        df_up = df_os[df_os['Warehouse'].str.startswith('UP')].copy()
-        df_hr = df_os[df_os['Warehouse'].str.startswith('HR')].copy()
+        # Match the prefixes once per warehouse category, then select rows by integer code.
+        # Boolean selection already returns new frames, so no .copy().
+        warehouse = df_os['Warehouse'].astype('category')
+        prefixes = warehouse.cat.categories.astype(str).str[:2]
+        warehouse_codes = warehouse.cat.codes.to_numpy()
+        df_up = df_os[np.isin(warehouse_codes, np.flatnonzero(prefixes == 'UP'))]
+        df_hr = df_os[np.isin(warehouse_codes, np.flatnonzero(prefixes == 'HR'))]
         logger.info(f"Split data UP: {df_up.shape} HR: {df_hr.shape}")
         return df_up, df_hr
     
@@ -272,19 +386,34 @@ class OrderSummaryProcessor:
         """
         Prepare data with required columns without aggregation to preserve individual records.
         """
-        # Create a copy to avoid modifying the original dataframe
-        result_df = df.copy()
+        # Define the required columns in the specified order (SKU Desc is renamed to SKU Description)
+        description_col = 'SKU Desc' if 'SKU Desc' in df.columns else 'SKU Description'
+        source_columns = ['Warehouse', 'SKU Code', description_col, 'Order Date', 'SKU Category', 'SKU Sub Category', 'Sales Qty', 'Sales Value']
         
-        # Create the Merge column by concatenating Warehouse and SKU Code
-        result_df['Merge'] = result_df['Warehouse'] + result_df['SKU Code']
+        # Select only the required columns instead of copying the whole frame first
+        result_df = df[source_columns]
+        result_df.columns = ['Warehouse', 'SKU Code', 'SKU Description', 'Order Date', 'SKU Category', 'SKU Sub Category', 'Sales Qty', 'Sales Value']
         
-        # Rename SKU Desc to SKU Description
-        result_df = result_df.rename(columns={'SKU Desc': 'SKU Description'})
+        # Create the Merge column by concatenating Warehouse and SKU Code
+        result_df.insert(0, 'Merge', [warehouse + sku for warehouse, sku in zip(df['Warehouse'].astype(str).to_numpy(), df['SKU Code'].to_numpy())])
         
-        # Define the required columns in the specified order
-        column_order = ['Merge', 'Warehouse', 'SKU Code', 'SKU Description', 'Order Date', 'SKU Category', 'SKU Sub Category', 'Sales Qty', 'Sales Value']
         # Return only the required columns without any aggregation
-        return result_df[column_order]
+        return result_df
+    
+    def _drop_superseded_rows(self, existing_df: pd.DataFrame, new_ids: set) -> pd.DataFrame:
+        """
+        Drop existing MTD rows whose uniqueID is being re-delivered in today's data.
+        
+        Args:
+            existing_df: Rows already in the MTD file, with a uniqueID column
+            new_ids: uniqueIDs of the incoming rows
+            
+        Returns:
+            pd.DataFrame: Existing rows not superseded by the new data
+        """
+        existing_ids = existing_df['uniqueID'].to_numpy()
+        keep = np.fromiter((uid not in new_ids for uid in existing_ids), dtype=bool, count=len(existing_ids))
+        return existing_df[keep]
     
     def mtd_data(self, df_os_final: pd.DataFrame, mtd_prefix: str) -> bool:
         """
@@ -314,10 +443,12 @@ class OrderSummaryProcessor:
                 raise ValueError("'Order Date' column not found in df_os_final")
             
             # Convert Order Date to string format for concatenation
-            df_new['Order Date'] = pd.to_datetime(df_new['Order Date']).dt.strftime('%Y-%m-%d')
-            df_new['uniqueID'] = df_new['Merge'].astype(str) + '_' + df_new['Order Date'].astype(str)
+            df_new['Order Date'] = format_iso_dates(df_new['Order Date'])
+            df_new['uniqueID'] = [f"{merge}_{order_date}" for merge, order_date in zip(df_new['Merge'].astype(str).to_numpy(), df_new['Order Date'].astype(str).to_numpy())]
             
             logger.info(f"Created uniqueID for {len(df_new)} new records")
+            # Hash set of incoming IDs, built once for the existing-row dedup below
+            new_ids = set(df_new['uniqueID'])
             
             # Check if file exists in S3
             file_exists = False
@@ -348,19 +479,19 @@ class OrderSummaryProcessor:
                         combined_df = df_new.copy()
                     else:
                         # Create uniqueID for existing data
-                        existing_df['Order Date'] = pd.to_datetime(existing_df['Order Date']).dt.strftime('%Y-%m-%d')
-                        existing_df['uniqueID'] = existing_df['Merge'].astype(str) + '_' + existing_df['Order Date'].astype(str)
+                        existing_df['Order Date'] = format_iso_dates(existing_df['Order Date'])
+                        existing_df['uniqueID'] = [f"{merge}_{order_date}" for merge, order_date in zip(existing_df['Merge'].astype(str).to_numpy(), existing_df['Order Date'].astype(str).to_numpy())]
                         logger.info(f"Created uniqueID for {len(existing_df)} existing records")
                         
                         # Remove rows from existing_df that have matching uniqueID values in df_new
-                        existing_df_filtered = existing_df[~existing_df['uniqueID'].isin(df_new['uniqueID'])]
+                        existing_df_filtered = self._drop_superseded_rows(existing_df, new_ids)
                         
                         # Combine filtered existing data with new data
                         combined_df = pd.concat([existing_df_filtered, df_new], ignore_index=True)
                         
                         logger.info(f"Merged data: {len(existing_df_filtered)} existing + {len(df_new)} new = {len(combined_df)} total records")
                 else:
-                    existing_df_filtered = existing_df[~existing_df['uniqueID'].isin(df_new['uniqueID'])]
+                    existing_df_filtered = self._drop_superseded_rows(existing_df, new_ids)
                     combined_df = pd.concat([existing_df_filtered, df_new], ignore_index=True)
                     
                     logger.info(f"Merged data: {len(existing_df_filtered)} existing + {len(df_new)} new = {len(combined_df)} total records")
@@ -380,11 +511,12 @@ class OrderSummaryProcessor:
             excel_buffer.seek(0)
             
             logger.info(f"Uploading Excel file to S3: {s3_key}")
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=excel_buffer.getvalue(),
-                ContentType='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            # Upload straight from the buffer; large workbooks go up as multipart chunks
+            self.s3_client.upload_fileobj(
+                excel_buffer,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={'ContentType': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'}
             )
             
             logger.info(f"Successfully uploaded {filename} with {len(combined_df)} records")
@@ -432,11 +564,16 @@ class OrderSummaryProcessor:
             self.mtd_data(datasets["complete"], mtd_prefix)
             
             # Step 8: Upload all processed files to S3
+            # The three CSVs are independent, so upload them concurrently; results keep dataset order
             upload_results = {}
-            for file_type, df in datasets.items():
-                filename = output_filenames[file_type]
-                upload_results[filename] = self.upload_csv_to_s3(df, filename, output_prefix)
-                logger.info(f"Uploaded {filename}: {len(df)} rows")
+            with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(datasets))) as executor:
+                futures = {}
+                for file_type, df in datasets.items():
+                    filename = output_filenames[file_type]
+                    futures[filename] = (executor.submit(self.upload_csv_to_s3, df, filename, output_prefix), len(df))
+                for filename, (future, row_count) in futures.items():
+                    upload_results[filename] = future.result()
+                    logger.info(f"Uploaded {filename}: {row_count} rows")
             
             logger.info("Pipeline completed successfully")
             return upload_results
@@ -449,7 +586,7 @@ def main():
     """
     Main function to demonstrate usage of OrderSummaryProcessor.
     """
-    load_dotenv()
+    load_env()
     
     try:
         processor = OrderSummaryProcessor(
@@ -484,10 +621,27 @@ def main():
         for filename, success in results.items():
             status = "SUCCESS" if success else "FAILED"
             print(f"{status}: {filename}")
+        
+        return results
             
     except Exception as e:
         logger.error(f"Main execution failed: {str(e)}")
         raise
 
+
+def run() -> int:
+    """
+    Entry point used by main.py to run the processor in-process.
+    
+    Returns:
+        Exit status matching a standalone run: 0 on success, 1 if the pipeline raised
+    """
+    try:
+        main()
+        return 0
+    except Exception:
+        logger.exception("Processor run failed")
+        return 1
+
 if __name__ == "__main__":
     main()
@@ -1,21 +1,25 @@
 import os
 import boto3
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from botocore.exceptions import ClientError
-from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION, S3_BUCKET_NAME
+from config import cfg
 from logger_config import setup_logger, get_default_log_file
 
 # Setup logger
 logger = setup_logger('s3_utils', get_default_log_file('s3_utils'))
 
+# Concurrent uploads share one client; keep within botocore's default pool of 10 connections
+UPLOAD_WORKERS = 8
+
 class S3Uploader:
     def __init__(self):
         self.s3_client = boto3.client(
             's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
+            aws_access_key_id=cfg.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=cfg.AWS_SECRET_ACCESS_KEY,
+            region_name=cfg.AWS_REGION
         )
-        self.bucket_name = S3_BUCKET_NAME
+        self.bucket_name = cfg.S3_BUCKET_NAME
     
     def upload_file(self, file_path, s3_key):
         """
@@ -29,17 +33,40 @@ class S3Uploader:
             bool: True if file was uploaded, else False
         """
         try:
-            logger.info(f"Uploading {file_path} to s3://{self.bucket_name}/{s3_key}")
+            logger.info("Uploading %s to s3://%s/%s", file_path, self.bucket_name, s3_key)
             self.s3_client.upload_file(
                 Filename=file_path,
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
-            logger.info(f"Successfully uploaded {file_path} to s3://{self.bucket_name}/{s3_key}")
+            logger.info("Successfully uploaded %s to s3://%s/%s", file_path, self.bucket_name, s3_key)
             return True
         except ClientError as e:
-            logger.error(f"Error uploading to S3: {str(e)}")
+            logger.error("Error uploading to S3: %s", e)
             return False
         except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
+            logger.error("Unexpected error: %s", e)
             return False
+    
+    def upload_files(self, uploads):
+        """
+        Upload several files concurrently with the shared (thread-safe) client
+        
+        Args:
+            uploads (list): (file_path, s3_key) pairs
+            
+        Returns:
+            dict: Mapping of file_path to True if uploaded, else False
+        """
+        if not uploads:
+            return {}
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(uploads))) as executor:
+            futures = {
+                executor.submit(self.upload_file, file_path, s3_key): file_path
+                for file_path, s3_key in uploads
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return results
@@ -7,7 +7,7 @@ Comprehensive verification of all output files generated by the WMS crawl script
 import boto3
 import os
 from datetime import datetime
-from dotenv import load_dotenv
+from config import load_env
 from typing import Dict, List, Tuple
 
 def verify_s3_outputs(date_suffix: str = None) -> Dict[str, any]:
@@ -20,7 +20,7 @@ def verify_s3_outputs(date_suffix: str = None) -> Dict[str, any]:
     Returns:
         Dictionary with verification results
     """
-    load_dotenv()
+    load_env()
     
     if not date_suffix:
         date_suffix = datetime.now().strftime("%Y%m%d")
@@ -97,6 +97,9 @@ def verify_s3_outputs(date_suffix: str = None) -> Dict[str, any]:
                 file_details = {obj['Key'].split('/')[-1]: obj for obj in response['Contents']}
                 
                 for expected_file in expected_files:
+                    # Processed CSVs may be uploaded gzip-compressed (ORDER_OUTPUT_GZIP)
+                    if expected_file not in existing_files and f"{expected_file}.gz" in existing_files:
+                        expected_file = f"{expected_file}.gz"
                     if expected_file in existing_files:
                         found_files.append(expected_file)
                         file_info = file_details[expected_file]